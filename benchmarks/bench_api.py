@@ -0,0 +1,213 @@
+"""End-to-end benchmarks against a local Gyazo API stub server
+
+Results are written as JSON so they can be compared across releases.
+
+Usage: python benchmarks/bench_api.py [--images N] [--latency SECONDS]
+                                      [--image-bytes N] [--uploads N]
+                                      [--repeat N] [--output FILE]
+                                      [--only NAME ...]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import requests
+
+# Benchmark the checkout, not an installed release
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gyazo import Api, Image, ImageList, Metrics, __version__  # noqa: E402
+from stub_server import StubServer, make_record  # noqa: E402
+
+
+def bench_list(api, args):
+    n_requests = 20
+    started = time.perf_counter()
+    for n in range(n_requests):
+        api.get_image_list(page=n % 5 + 1, per_page=100)
+    return time.perf_counter() - started, n_requests, None
+
+
+def bench_list_unpooled(api, args):
+    # Baseline for bench_list: a new connection for every request, as with
+    # a bare requests.request() call
+    n_requests = 20
+    url = api.api_url + '/api/images'
+    headers = {'Authorization': 'Bearer benchmark'}
+    started = time.perf_counter()
+    for n in range(n_requests):
+        response = requests.request(
+            'get', url, params={'page': n % 5 + 1, 'per_page': 100},
+            headers=headers)
+        _, result = api._parse_and_check(response)
+        images = ImageList.from_list(result)
+        images.set_attributes_from_headers(response.headers)
+    return time.perf_counter() - started, n_requests, None
+
+
+def bench_paginate(api, args):
+    started = time.perf_counter()
+    count = sum(1 for _ in api.iter_images(per_page=100, max_workers=4))
+    return time.perf_counter() - started, count, None
+
+
+def bench_upload(api, args):
+    directory = tempfile.mkdtemp()
+    try:
+        paths = []
+        for n in range(args.uploads):
+            path = os.path.join(directory, '{}.png'.format(n))
+            with open(path, 'wb') as f:
+                f.write(os.urandom(args.image_bytes))
+            paths.append(path)
+        started = time.perf_counter()
+        for result in api.upload_images(paths, max_workers=4):
+            if not result.ok:
+                raise result.error
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(directory)
+    return elapsed, args.uploads, args.uploads * args.image_bytes
+
+
+def bench_download(api, args):
+    images = api.get_image_list(per_page=min(args.images, 100))
+    directory = tempfile.mkdtemp()
+    try:
+        report = api.download_images(images, directory, max_workers=8,
+                                     skip_existing=False)
+    finally:
+        shutil.rmtree(directory)
+    if report.failures:
+        raise report.failures[0].error
+    return report.elapsed, report.downloaded, report.bytes
+
+
+def _records(args):
+    return [make_record('https://gyazo.com', n) for n in range(args.records)]
+
+
+def bench_from_dict(api, args):
+    records = _records(args)
+    started = time.perf_counter()
+    for record in records:
+        Image.from_dict(record)
+    return time.perf_counter() - started, len(records), None
+
+
+def bench_from_list(api, args):
+    records = _records(args)
+    started = time.perf_counter()
+    ImageList.from_list(records)
+    return time.perf_counter() - started, len(records), None
+
+
+def bench_to_json(api, args):
+    images = ImageList.from_list(_records(args))
+    started = time.perf_counter()
+    images.to_json()
+    return time.perf_counter() - started, len(images), None
+
+
+BENCHMARKS = [
+    ('list', bench_list),
+    ('list (unpooled)', bench_list_unpooled),
+    ('paginate', bench_paginate),
+    ('upload', bench_upload),
+    ('download', bench_download),
+    ('Image.from_dict', bench_from_dict),
+    ('ImageList.from_list', bench_from_list),
+    ('ImageList.to_json', bench_to_json),
+]
+
+
+def run(name, func, api, args):
+    timings = []
+    operations = size = None
+    for _ in range(args.repeat):
+        elapsed, operations, size = func(api, args)
+        timings.append(elapsed)
+    best = min(timings)
+    result = {
+        'name': name,
+        'repeat': args.repeat,
+        'operations': operations,
+        'min_seconds': best,
+        'median_seconds': statistics.median(timings),
+        'operations_per_second': operations / best if best else None,
+    }
+    if size is not None:
+        result['bytes'] = size
+        result['bytes_per_second'] = size / best if best else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', type=int, default=1000,
+                        help='number of images served by the stub')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='delay added to every response in seconds')
+    parser.add_argument('--image-bytes', type=int, default=64 * 1024,
+                        help='size of downloaded and uploaded files')
+    parser.add_argument('--uploads', type=int, default=50)
+    parser.add_argument('--records', type=int, default=10000,
+                        help='number of records parsed by model benchmarks')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write JSON results to a file')
+    parser.add_argument('--only', nargs='+', metavar='NAME',
+                        choices=[name for name, _ in BENCHMARKS])
+    args = parser.parse_args()
+
+    results = []
+    metrics = Metrics()
+    with StubServer(images=args.images, latency=args.latency,
+                    image_bytes=args.image_bytes) as server:
+        with Api(access_token='benchmark', api_url=server.url,
+                 upload_url=server.url, pool_maxsize=16,
+                 conditional_requests=False, hooks=[metrics]) as api:
+            for name, func in BENCHMARKS:
+                if args.only and name not in args.only:
+                    continue
+                result = run(name, func, api, args)
+                print('{:22} {:10.1f} ms {:12.1f} ops/s'.format(
+                    name, result['min_seconds'] * 1000,
+                    result['operations_per_second'] or 0),
+                    file=sys.stderr)
+                results.append(result)
+
+    report = {
+        'gyazo_version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now(
+            datetime.timezone.utc).isoformat(),
+        'parameters': {
+            'images': args.images,
+            'latency': args.latency,
+            'image_bytes': args.image_bytes,
+            'uploads': args.uploads,
+            'records': args.records,
+        },
+        'results': results,
+        'requests': metrics.snapshot(),
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
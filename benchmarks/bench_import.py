@@ -0,0 +1,109 @@
+"""Import-time benchmark using ``python -X importtime``
+
+Each statement is imported in a fresh interpreter. The cumulative import
+time of the gyazo modules and the heavy dependencies pulled in are
+reported as JSON. With ``--max-ms``, the exit status is non-zero when a
+statement gets slower, so the benchmark can guard against regressions.
+
+Usage: python benchmarks/bench_import.py [--repeat N] [--max-ms MS]
+                                         [--output FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Statements run from the checkout, so that its gyazo package is imported
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATEMENTS = [
+    'import gyazo',
+    'from gyazo import Image, ImageList, GyazoError',
+    'from gyazo import Api',
+]
+
+HEAVY_MODULES = ('requests', 'dateutil', 'json', 'asyncio', 'sqlite3')
+
+
+def _run(statement):
+    code = statement + '\nimport sys\nprint(",".join(m for m in {!r} ' \
+        'if m in sys.modules))'.format(HEAVY_MODULES)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True, cwd=ROOT)
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line.split('|')
+        try:
+            cumulative = int(fields[1])
+        except ValueError:
+            continue  # The header line
+        # Top-level imports only, which include their dependencies
+        if not fields[2].startswith('  '):
+            imports.append((fields[2].strip(), cumulative))
+    loaded = [m for m in process.stdout.strip().split(',') if m]
+    return imports, loaded
+
+
+def measure(statement, startup):
+    """Return the import time of ``statement`` in seconds and the heavy
+    modules it loaded, excluding modules imported at interpreter startup"""
+    imports, loaded = _run(statement)
+    total = sum(cumulative for name, cumulative in imports
+                if name not in startup)
+    return total / 1e6, [m for m in loaded if m not in startup]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float,
+                        help='fail if a statement takes longer on median')
+    parser.add_argument('--output', help='write JSON results to a file')
+    args = parser.parse_args()
+
+    # Warm up the file system cache and byte-code files
+    _run(STATEMENTS[-1])
+    startup_imports, startup_loaded = _run('pass')
+    startup = {name for name, _ in startup_imports} | set(startup_loaded)
+
+    results = []
+    failed = False
+    for statement in STATEMENTS:
+        timings = []
+        for _ in range(args.repeat):
+            seconds, loaded = measure(statement, startup)
+            timings.append(seconds)
+        median = statistics.median(timings)
+        results.append({
+            'statement': statement,
+            'repeat': args.repeat,
+            'min_seconds': min(timings),
+            'median_seconds': median,
+            'heavy_modules': loaded,
+        })
+        print('{:50} {:8.1f} ms  {}'.format(
+            statement, median * 1000, ', '.join(loaded) or '-'),
+            file=sys.stderr)
+        if args.max_ms is not None and median * 1000 > args.max_ms:
+            failed = True
+
+    report = {'python': sys.version.split()[0], 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
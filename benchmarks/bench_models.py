@@ -0,0 +1,97 @@
+"""Micro-benchmarks for building image models from API responses
+
+Usage: python benchmarks/bench_models.py [--records N] [--repeat N]
+                                         [--memory-records N]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from unittest import mock
+
+import dateutil.parser
+
+# Benchmark the checkout, not an installed release
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gyazo.image import Image, ImageList  # noqa: E402
+
+
+class DictImage:
+    """Image stored in a per-instance __dict__, as before __slots__"""
+
+    def __init__(self, **kwargs):
+        self.created_at = kwargs['created_at']
+        self.image_id = kwargs.get('image_id')
+        self.permalink_url = kwargs.get('permalink_url')
+        self.thumb_url = kwargs.get('thumb_url')
+        self.type = kwargs['type']
+        self.url = kwargs.get('url')
+        self.ocr = kwargs.get('ocr')
+
+
+def make_records(n):
+    records = []
+    for i in range(n):
+        image_id = '{:032x}'.format(i)
+        records.append({
+            'image_id': image_id,
+            'permalink_url': 'https://gyazo.com/' + image_id,
+            'thumb_url': 'https://thumb.gyazo.com/thumb/200/' + image_id,
+            'url': 'https://i.gyazo.com/' + image_id + '.png',
+            'type': 'png',
+            'created_at': '2020-02-01T13:{:02d}:{:02d}.{:03d}+0000'.format(
+                i // 60 % 60, i % 60, i % 1000),
+            'ocr': {'locale': 'en', 'description': 'text ' + image_id},
+        })
+    return records
+
+
+def bench_from_list(records, repeat):
+    return min(timeit.repeat(lambda: ImageList.from_list(records),
+                             number=1, repeat=repeat))
+
+
+def measure_instances(cls, images):
+    """Return bytes allocated for one instance of cls per image"""
+    fields = [{attr: getattr(i, attr) for attr in Image.__slots__}
+              for i in images]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [cls(**f) for f in fields]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--memory-records', type=int, default=100000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    fast = bench_from_list(records, args.repeat)
+    with mock.patch('gyazo.image.parse_datetime', dateutil.parser.parse):
+        slow = bench_from_list(records, args.repeat)
+
+    print('ImageList.from_list, {} records'.format(args.records))
+    print('  dateutil.parser: {:8.1f} ms'.format(slow * 1000))
+    print('  fast path:       {:8.1f} ms'.format(fast * 1000))
+    print('  speedup:         {:8.1f}x'.format(slow / fast))
+
+    images = ImageList.from_list(make_records(args.memory_records))
+    dict_bytes = measure_instances(DictImage, images)
+    slots_bytes = measure_instances(Image, images)
+    print('Image instances, {} images'.format(args.memory_records))
+    print('  __dict__:  {:8.1f} MiB'.format(dict_bytes / 2 ** 20))
+    print('  __slots__: {:8.1f} MiB'.format(slots_bytes / 2 ** 20))
+    print('  saving:    {:8.1f} %'.format(
+        100 * (1 - slots_bytes / dict_bytes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""An in-process HTTP server emulating the Gyazo API for benchmarks
+
+Serves ``/api/images``, ``/api/images/<id>``, ``/api/upload``,
+``/api/oembed`` and image files under ``/i/``, with a configurable latency
+added to every response and configurable payload sizes. Like the real API,
+the library is listed newest first, and uploads and deletes change it.
+"""
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import itertools
+import json
+from socketserver import ThreadingMixIn
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once
+    request_queue_size = 128
+
+
+# Creation time of the newest image of the initial library
+BASE_TIME = datetime(2020, 2, 1, 13, 0, tzinfo=timezone.utc)
+
+
+def make_record(base_url, n, age=None):
+    """Return the JSON record of the n-th image
+
+    :param n: Image number; higher numbers are older images
+    :param age: (optional) Seconds the image was created before
+                ``BASE_TIME``, negative for later images (default: ``n``
+                plus a fraction, so that records are newest first)
+    """
+    image_id = '{:032x}'.format(n)
+    if age is None:
+        age = n + n % 1000 / 1000
+    created_at = BASE_TIME - timedelta(seconds=age)
+    return {
+        'image_id': image_id,
+        'permalink_url': base_url + '/' + image_id,
+        'thumb_url': base_url + '/i/thumb/' + image_id + '.png',
+        'url': base_url + '/i/' + image_id + '.png',
+        'type': 'png',
+        'created_at': '{:%Y-%m-%dT%H:%M:%S}.{:03d}+0000'.format(
+            created_at, created_at.microsecond // 1000),
+        'ocr': {'locale': 'en', 'description': 'text ' + image_id},
+    }
+
+
+class StubServer:
+    """A local Gyazo API stub running in a background thread
+
+    Usage::
+
+        with StubServer(images=1000, latency=0.01) as server:
+            api = Api(api_url=server.url, upload_url=server.url)
+    """
+
+    def __init__(self, images=1000, latency=0.0, image_bytes=64 * 1024,
+                 thumb_bytes=4 * 1024, port=0):
+        """
+        :param images: Number of images in the initial library
+        :param latency: Delay added to every response in seconds
+        :param image_bytes: Size of image files in bytes
+        :param thumb_bytes: Size of thumbnail files in bytes
+        :param port: Port to listen on (default: any free port)
+        """
+        self.latency = latency
+        self.image_data = b'\x89PNG' + b'\0' * max(0, image_bytes - 4)
+        self.thumb_data = b'\x89PNG' + b'\0' * max(0, thumb_bytes - 4)
+        #: The number of requests handled
+        self.requests = 0
+        #: The number of request body bytes received
+        self.received_bytes = 0
+        self._lock = threading.Lock()
+        # Image numbers, newest first, and ages of uploaded images
+        self._library = list(range(images))
+        self._present = set(self._library)
+        self._ages = {}
+        self._uploads = itertools.count(images)
+        self._upload_ages = itertools.count(1)
+        self._server = _ThreadingHTTPServer(('127.0.0.1', port),
+                                            self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def images(self):
+        """The number of images in the library"""
+        return len(self._library)
+
+    def _record(self, n):
+        return make_record(self.url, n, self._ages.get(n))
+
+    def _page(self, start, stop):
+        with self._lock:
+            total = len(self._library)
+            return total, [self._record(n) for n in self._library[start:stop]]
+
+    def _get(self, n):
+        with self._lock:
+            return self._record(n) if n in self._present else None
+
+    def _upload(self):
+        with self._lock:
+            n = next(self._uploads)
+            self._ages[n] = -next(self._upload_ages)
+            self._library.insert(0, n)
+            self._present.add(n)
+            return self._record(n)
+
+    def _delete(self, n):
+        with self._lock:
+            if n not in self._present:
+                return None
+            self._present.remove(n)
+            self._library.remove(n)
+            return self._record(n)
+
+    def _count(self, received):
+        with self._lock:
+            self.requests += 1
+            self.received_bytes += received
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+            def _handle(self, method):
+                body = self._read_body()
+                stub._count(len(body))
+                if stub.latency:
+                    time.sleep(stub.latency)
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                path = parts.path
+                if method == 'GET' and path == '/api/images':
+                    self._list(query)
+                elif method == 'GET' and path.startswith('/api/images/'):
+                    self._image(path[len('/api/images/'):], stub._get)
+                elif method == 'DELETE' and path.startswith('/api/images/'):
+                    self._image(path[len('/api/images/'):], stub._delete)
+                elif method == 'POST' and path == '/api/upload':
+                    self._json(stub._upload())
+                elif method == 'GET' and path == '/api/oembed':
+                    self._json({'version': '1.0', 'type': 'photo',
+                                'provider_name': 'Gyazo',
+                                'url': query.get('url', ''),
+                                'width': 640, 'height': 320})
+                elif method == 'GET' and path.startswith('/i/thumb/'):
+                    self._send(200, stub.thumb_data, 'image/png')
+                elif method == 'GET' and path.startswith('/i/'):
+                    self._send(200, stub.image_data, 'image/png')
+                else:
+                    self._json({'message': 'not found'}, status=404)
+
+            def _read_body(self):
+                length = self.headers.get('Content-Length')
+                if length is not None:
+                    return self.rfile.read(int(length))
+                if self.headers.get('Transfer-Encoding') != 'chunked':
+                    return b''
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return b''.join(chunks)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+
+            def _list(self, query):
+                page = int(query.get('page', 1))
+                per_page = int(query.get('per_page', 20))
+                start = (page - 1) * per_page
+                total, records = stub._page(start, start + per_page)
+                self._json(records, headers={
+                    'X-Total-Count': str(total),
+                    'X-Current-Page': str(page),
+                    'X-Per-Page': str(per_page),
+                    'X-User-Type': 'lite',
+                })
+
+            def _image(self, image_id, action):
+                try:
+                    record = action(int(image_id, 16))
+                except ValueError:
+                    record = None
+                if record is None:
+                    self._json({'message': 'image not found.'}, status=404)
+                    return
+                self._json(record)
+
+            def _json(self, data, status=200, headers=None):
+                body = json.dumps(data).encode('utf-8')
+                self._send(status, body, 'application/json', headers)
+
+            def _send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
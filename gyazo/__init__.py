@@ -1,7 +1,109 @@
+import importlib
+import sys
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List
+
 from .__about__ import __version__
-from .api import Api
-from .error import GyazoError
-from .image import Image, ImageList
 
 
-__all__ = ["Api", "GyazoError", "Image", "ImageList", "__version__"]
+# Public names and the submodules defining them. Submodules are imported on
+# first access, so ``import gyazo`` does not load requests or asyncio until
+# they are needed.
+_EXPORTS = {
+    "Api": "api",
+    "AsyncApi": "aio",
+    "BatchResult": "batch",
+    "BlobCache": "blobcache",
+    "Cache": "cache",
+    "DownloadReport": "batch",
+    "GyazoError": "error",
+    "Hook": "metrics",
+    "Image": "image",
+    "ImageColumns": "columnar",
+    "ImageList": "image",
+    "ImageQuery": "query",
+    "LRUCache": "cache",
+    "Metrics": "metrics",
+    "OcrIndex": "ocrindex",
+    "RateLimiter": "ratelimit",
+    "RetryPolicy": "ratelimit",
+    "SyncIndex": "sync",
+    "SyncResult": "sync",
+    "UploadIndex": "dedup",
+    "UploadItem": "batch",
+}  # type: Dict[str, str]
+
+# Submodules loaded as attributes by ``import gyazo`` before imports were
+# deferred, e.g. ``gyazo.api.Api``
+_SUBMODULES = frozenset([
+    "aio", "api", "batch", "blobcache", "cache", "cli", "columnar", "dedup",
+    "error", "image", "metrics", "multipart", "ocrindex", "query",
+    "ratelimit", "serializer", "sync",
+])  # type: FrozenSet[str]
+
+
+if TYPE_CHECKING:
+    from .aio import AsyncApi
+    from .api import Api
+    from .batch import BatchResult, DownloadReport, UploadItem
+    from .blobcache import BlobCache
+    from .cache import Cache, LRUCache
+    from .columnar import ImageColumns
+    from .dedup import UploadIndex
+    from .error import GyazoError
+    from .image import Image, ImageList
+    from .metrics import Hook, Metrics
+    from .ocrindex import OcrIndex
+    from .query import ImageQuery
+    from .ratelimit import RateLimiter, RetryPolicy
+    from .sync import SyncIndex, SyncResult
+elif sys.version_info < (3, 7):
+    # Module-level __getattr__ (PEP 562) is not available before Python 3.7.
+    # Only the original names are imported; import other names from their
+    # submodules, e.g. ``from gyazo.aio import AsyncApi``.
+    from .api import Api
+    from .error import GyazoError
+    from .image import Image, ImageList
+else:
+    def __getattr__(name: str) -> Any:
+        if name in _SUBMODULES:
+            return importlib.import_module("." + name, __name__)
+        module = _EXPORTS.get(name)
+        if module is None:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(__name__, name))
+        value = getattr(importlib.import_module("." + module, __name__), name)
+        globals()[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(globals()) | set(_EXPORTS) | _SUBMODULES)
+
+
+__all__ = [
+    "Api",
+    "GyazoError",
+    "Image",
+    "ImageList",
+    "__version__",
+]
+
+if TYPE_CHECKING or sys.version_info >= (3, 7):
+    __all__ += [
+        "AsyncApi",
+        "BatchResult",
+        "BlobCache",
+        "Cache",
+        "DownloadReport",
+        "Hook",
+        "ImageColumns",
+        "ImageQuery",
+        "LRUCache",
+        "Metrics",
+        "OcrIndex",
+        "RateLimiter",
+        "RetryPolicy",
+        "SyncIndex",
+        "SyncResult",
+        "UploadIndex",
+        "UploadItem",
+    ]
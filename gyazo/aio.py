@@ -0,0 +1,371 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+import functools
+from types import TracebackType
+from typing import (Any, Callable, Dict, Iterable, Iterator, Optional, Type,
+                    TypeVar)
+
+from .api import (Api, Timeout, _Attempts, _body_size, _check_response,
+                  _upload_body)
+from .error import GyazoError
+from .image import Image, ImageList
+from .multipart import FileSource, MultipartEncoder, ProgressCallback
+from .ratelimit import RateLimiter
+
+
+T = TypeVar('T')
+
+TRANSPORTS = ('httpx', 'threads')
+
+
+def _httpx_available() -> bool:
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _httpx_timeout(timeout: Optional[Timeout]) -> Any:
+    import httpx
+
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+async def _acquire(limiter: RateLimiter) -> None:
+    waited = 0.0
+    while True:
+        wait = limiter.try_acquire(waited)
+        if wait <= 0:
+            return
+        await asyncio.sleep(wait)
+        waited += wait
+
+
+def _parse_and_check(response: Any) -> Any:
+    return _check_response(response.status_code, response.headers,
+                           response.reason_phrase, response.json)
+
+
+class _AsyncChunks:
+    """Read a blocking iterator of byte chunks on an executor"""
+
+    def __init__(self, chunks: Iterable[bytes], executor: Executor) -> None:
+        self._chunks = iter(chunks)  # type: Iterator[bytes]
+        self._executor = executor
+
+    def __aiter__(self) -> '_AsyncChunks':
+        return self
+
+    async def __anext__(self) -> bytes:
+        loop = asyncio.get_event_loop()
+        chunk = await loop.run_in_executor(self._executor, next,
+                                           self._chunks, None)
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+
+class AsyncApi:
+    """An asyncio interface for Gyazo API
+
+    With ``httpx`` installed (``pip install python-gyazo[async]``),
+    requests are sent by an ``httpx.AsyncClient`` on the event loop.
+    Otherwise every coroutine runs the corresponding :class:`gyazo.Api`
+    call on a bounded pool of worker threads. Either way the event loop is
+    never blocked and all requests share one pool of keep-alive
+    connections.
+
+    The ``httpx`` transport honours the rate limiter, the retry policy and
+    the hooks of :attr:`api`; caches and indexes set on :attr:`api` are
+    only used by the ``threads`` transport.
+    """
+
+    def __init__(self,
+                 client_id: Optional[str] = None,
+                 client_secret: Optional[str] = None,
+                 access_token: Optional[str] = None,
+                 api_url: str = 'https://api.gyazo.com',
+                 upload_url: str = 'https://upload.gyazo.com',
+                 max_concurrency: int = 10,
+                 timeout: Optional[Timeout] = None,
+                 transport: Optional[str] = None) -> None:
+        """
+        :param client_id: (optional) API client ID
+        :param client_secret: (optional) API secret
+        :param access_token: (optional) API access token
+        :param api_url: (optional) API endpoint URL
+                        (default: https://api.gyazo.com)
+        :param upload_url: (optional) Upload API endpoint URL
+                           (default: https://upload.gyazo.com)
+        :param max_concurrency: (optional) Maximum number of requests in
+                                flight at the same time (default: 10)
+        :param timeout: (optional) Request timeout in seconds, or a
+                        ``(connect, read)`` tuple (default: no timeout)
+        :param transport: (optional) ``httpx`` or ``threads``
+                          (default: ``httpx`` if installed)
+        :raise ImportError: if ``httpx`` is requested but not installed
+        """
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        if transport is None:
+            transport = 'httpx' if _httpx_available() else 'threads'
+        elif transport not in TRANSPORTS:
+            raise ValueError('unknown transport: ' + transport)
+        elif transport == 'httpx':
+            import httpx  # noqa: F401
+        #: The underlying synchronous client
+        self.api = Api(client_id=client_id,
+                       client_secret=client_secret,
+                       access_token=access_token,
+                       api_url=api_url,
+                       upload_url=upload_url,
+                       pool_maxsize=max_concurrency,
+                       timeout=timeout)  # type: Api
+        #: ``httpx`` or ``threads``
+        self.transport = transport  # type: str
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        # Created on first request, as it belongs to the running event loop
+        self._client = None  # type: Optional[Any]
+        # Runs API calls of the threads transport, and reads upload files
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self) -> 'AsyncApi':
+        return self
+
+    async def __aexit__(self,
+                        exc_type: Optional[Type[BaseException]],
+                        exc_value: Optional[BaseException],
+                        traceback: Optional[TracebackType]) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections and shut down the worker threads
+
+        Threads are joined on the default executor of the loop, so the event
+        loop is not blocked while calls in flight finish.
+        """
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._shutdown)
+
+    def close(self) -> None:
+        """Shut down the worker threads and close pooled connections
+
+        This blocks until calls in flight finish; use :meth:`aclose` from a
+        coroutine. Connections of the ``httpx`` transport can only be closed
+        by :meth:`aclose`.
+
+        :raise RuntimeError: if the ``httpx`` transport has open connections
+        """
+        if self._client is not None:
+            raise RuntimeError('use aclose() to close the httpx transport')
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.api.close()
+
+    async def get_image_list(self,
+                             page: int = 1,
+                             per_page: int = 20) -> ImageList:
+        """Return a list of user's saved images
+
+        :param page: (optional) Page number (default: 1)
+        :param per_page: (optional) Number of images per page
+                         (default: 20, min: 1, max: 100)
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.get_image_list,
+                                   page=page, per_page=per_page)
+        response = await self._request(
+            'get', self.api.api_url + '/api/images',
+            params={'page': page, 'per_page': per_page},
+            with_access_token=True)
+        images = ImageList.from_list(_parse_and_check(response))
+        images.set_attributes_from_headers(response.headers)
+        return images
+
+    async def get_image(self, image_id: str) -> Image:
+        """Get an image
+
+        :param image_id: Image ID
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.get_image, image_id)
+        response = await self._request(
+            'get', self.api.api_url + '/api/images/' + image_id,
+            with_access_token=True)
+        return Image.from_dict(_parse_and_check(response))
+
+    async def upload_image(self,
+                           image_file: FileSource,
+                           referer_url: Optional[str] = None,
+                           title: Optional[str] = None,
+                           desc: Optional[str] = None,
+                           created_at: Optional[float] = None,
+                           collection_id: Optional[str] = None,
+                           filename: Optional[str] = None,
+                           chunk_size: int = 64 * 1024,
+                           progress: Optional[ProgressCallback] = None
+                           ) -> Image:
+        """Upload an image
+
+        :param image_file: File-like object of an image file, a path to an
+                           image file or an iterable of byte chunks
+        :param referer_url: Referer site URL
+        :param title: Site title
+        :param desc: Comment
+        :param created_at: Image's created time in unix time
+        :param collection_id: Collection ID
+        :param filename: (optional) File name sent with the image
+        :param chunk_size: (optional) Size of chunks read from the file in
+                           bytes (default: 65536)
+        :param progress: (optional) A callable receiving the number of bytes
+                         sent so far and the total request size; it is
+                         called from a worker thread
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.upload_image, image_file,
+                                   referer_url=referer_url,
+                                   title=title,
+                                   desc=desc,
+                                   created_at=created_at,
+                                   collection_id=collection_id,
+                                   filename=filename,
+                                   chunk_size=chunk_size,
+                                   progress=progress)
+        body = _upload_body(image_file, referer_url, title, desc, created_at,
+                            collection_id, filename, chunk_size, progress)
+        headers = {'Content-Type': body.content_type}
+        if body.length is not None:
+            headers['Content-Length'] = str(body.length)
+        response = await self._request(
+            'post', self.api.upload_url + '/api/upload', body=body,
+            headers=headers, with_access_token=True)
+        return Image.from_dict(_parse_and_check(response))
+
+    async def delete_image(self, image_id: str) -> Image:
+        """Delete an image
+
+        :param image_id: Image ID
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.delete_image, image_id)
+        response = await self._request(
+            'delete', self.api.api_url + '/api/images/' + image_id,
+            with_access_token=True)
+        return Image.from_dict(_parse_and_check(response))
+
+    async def get_oembed(self, url: str) -> Dict[str, Any]:
+        """Return an oEmbed format json dictionary
+
+        :param url: Image page URL (ex. http://gyazo.com/xxxxx)
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.get_oembed, url)
+        response = await self._request(
+            'get', self.api.api_url + '/api/oembed', params={'url': url})
+        return dict(_parse_and_check(response))
+
+    async def download(self, image: Image) -> Optional[bytes]:
+        """Download an image file if it exists
+
+        :param image: An image
+        :raise GyazoError:
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.download_image, image)
+        return await self._download(image.url)
+
+    async def download_thumb(self, image: Image) -> Optional[bytes]:
+        """Download a thumbnail image file
+
+        :param image: An image
+        :raise GyazoError:
+        """
+        if self.transport == 'threads':
+            return await self._run(self.api.download_image, image,
+                                   thumbnail=True)
+        return await self._download(image.thumb_url)
+
+    async def _download(self, url: Optional[str]) -> Optional[bytes]:
+        if url is None or url == '':
+            return None
+        response = await self._request('get', url)
+        if response.status_code >= 400:
+            raise GyazoError(
+                '{} {} for url: {}'.format(response.status_code,
+                                           response.reason_phrase, url),
+                status_code=response.status_code)
+        return bytes(response.content)
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=self._max_concurrency,
+                max_keepalive_connections=self._max_concurrency)
+            self._client = httpx.AsyncClient(
+                limits=limits, timeout=_httpx_timeout(self._timeout))
+        return self._client
+
+    async def _request(self,
+                       method: str,
+                       url: str,
+                       params: Optional[Dict[str, Any]] = None,
+                       body: Optional[MultipartEncoder] = None,
+                       headers: Optional[Dict[str, str]] = None,
+                       with_access_token: bool = False) -> Any:
+        """Send an HTTP request with the httpx transport
+
+        Retries, rate limiting and hooks follow
+        :meth:`gyazo.Api._request_url`.
+
+        :raise GyazoError:
+        """
+        import httpx
+
+        api = self.api
+        headers = dict(headers or {})
+        if with_access_token and api._access_token is not None:
+            headers['Authorization'] = 'Bearer ' + api._access_token
+        client = self._get_client()
+
+        attempts = _Attempts(api, method, url, _body_size(body, None))
+        while True:
+            await _acquire(api.rate_limiter)
+            attempts.start()
+            try:
+                response = await client.request(
+                    method.upper(), url,
+                    params=params,
+                    content=(_AsyncChunks(body, self._executor)
+                             if body is not None else None),
+                    headers=headers)
+            except httpx.HTTPError as e:
+                delay = attempts.failed(e)
+                if delay is None:
+                    raise GyazoError(str(e))
+                await asyncio.sleep(delay)
+                continue
+
+            delay = attempts.finished(response)
+            if delay is None:
+                return response
+            await response.aclose()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _run(self, func: Callable[..., T], *args: Any,
+                   **kwargs: Any) -> T:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
@@ -1,10 +1,40 @@
-from typing import Any, BinaryIO, Dict, MutableMapping, Optional, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+import time
+from types import TracebackType
+from typing import (TYPE_CHECKING, Any, BinaryIO, Callable, Deque, Dict,
+                    Generator, Iterable, Iterator, List, Mapping,
+                    MutableMapping, Optional, Tuple, Type, TypeVar, Union,
+                    cast)
+from urllib.parse import urlencode, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.models import Response
+from requests.structures import CaseInsensitiveDict
 
+from .batch import (BatchResult, DownloadReport, UploadItem,
+                    run_concurrently)
+from .blobcache import BlobCache
+from .cache import Cache, LRUCache
 from .error import GyazoError
-from .image import Image, ImageList
+from .image import DEFAULT_CHUNK_SIZE, Image, ImageList, _download_to_path
+from .metrics import Hook, RequestInfo
+from .multipart import FileSource, MultipartEncoder, ProgressCallback
+from .query import ImageQuery
+from .ratelimit import RateLimiter, RetryPolicy, parse_retry_after
+
+if TYPE_CHECKING:
+    from .dedup import UploadIndex
+    from .ocrindex import OcrIndex
+
+
+Timeout = Union[float, Tuple[float, float]]
+
+T = TypeVar('T')
 
 
 class Api:
@@ -15,7 +45,18 @@ class Api:
                  client_secret: Optional[str] = None,
                  access_token: Optional[str] = None,
                  api_url: str = 'https://api.gyazo.com',
-                 upload_url: str = 'https://upload.gyazo.com') -> None:
+                 upload_url: str = 'https://upload.gyazo.com',
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 timeout: Optional[Timeout] = None,
+                 cache: Optional[Cache] = None,
+                 conditional_requests: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry: Optional[RetryPolicy] = None,
+                 blob_cache: Optional[BlobCache] = None,
+                 upload_index: Optional['UploadIndex'] = None,
+                 hooks: Optional[Iterable[Hook]] = None,
+                 ocr_index: Optional['OcrIndex'] = None) -> None:
         """
         :param client_id: (optional) API client ID
         :param client_secret: (optional) API secret
@@ -24,78 +65,353 @@ class Api:
                         (default: https://api.gyazo.com)
         :param upload_url: (optional) Upload API endpoint URL
                            (default: https://upload.gyazo.com)
+        :param pool_connections: (optional) Number of connection pools to
+                                 cache per session (default: 10)
+        :param pool_maxsize: (optional) Maximum number of keep-alive
+                             connections per host (default: 10)
+        :param timeout: (optional) Request timeout in seconds, or a
+                        ``(connect, read)`` tuple (default: no timeout)
+        :param cache: (optional) A cache for :meth:`get_image` and
+                      :meth:`get_oembed` responses, e.g. :class:`LRUCache`
+        :param conditional_requests: (optional) Remember ``ETag`` and
+                                     ``Last-Modified`` validators with the
+                                     raw JSON of up to 256 responses and
+                                     send conditional requests
+                                     (default: false)
+        :param rate_limiter: (optional) A request budget shared by all
+                             threads (default: unlimited, honouring
+                             ``Retry-After`` sent by the server)
+        :param retry: (optional) How ``GET`` requests are retried on
+                      connection errors, 429 and 5xx responses
+                      (default: up to 3 retries with exponential backoff)
+        :param blob_cache: (optional) A local cache of files downloaded by
+                           :meth:`download_image`
+        :param upload_index: (optional) An index of uploaded files; when
+                             given, :meth:`upload_image` returns the
+                             previous image instead of uploading a file
+                             with the same content again
+        :param hooks: (optional) Hooks called around every HTTP request,
+                      e.g. :class:`Metrics`
+        :param ocr_index: (optional) A full-text index of OCR results,
+                          updated with every page fetched by
+                          :meth:`get_image_list`
         """
         self.api_url = api_url  # type: str
         self.upload_url = upload_url  # type: str
+        #: Request timeout passed to every request
+        self.timeout = timeout  # type: Optional[Timeout]
+        #: Response cache
+        self.cache = cache  # type: Optional[Cache]
+        #: Request budget shared by all threads
+        self.rate_limiter = (
+            rate_limiter if rate_limiter is not None else RateLimiter()
+        )  # type: RateLimiter
+        #: Local cache of downloaded files
+        self.blob_cache = blob_cache  # type: Optional[BlobCache]
+        #: Index of uploaded files used to skip duplicate uploads
+        self.upload_index = upload_index  # type: Optional[UploadIndex]
+        #: Hooks called around every HTTP request
+        self.hooks = list(hooks or [])  # type: List[Hook]
+        #: Full-text index of OCR results updated while listing images
+        self.ocr_index = ocr_index  # type: Optional[OcrIndex]
+        #: Retry policy for GET requests
+        self.retry = (
+            retry if retry is not None else RetryPolicy()
+        )  # type: RetryPolicy
         self._client_id = client_id  # type: Optional[str]
         self._client_secret = client_secret  # type: Optional[str]
         self._access_token = access_token  # type: Optional[str]
+        self._pool_connections = pool_connections  # type: int
+        self._pool_maxsize = pool_maxsize  # type: int
+        self._sessions = {}  # type: Dict[str, requests.Session]
+        self._sessions_lock = threading.Lock()
+        self._validators = (
+            LRUCache(maxsize=256) if conditional_requests else None
+        )  # type: Optional[LRUCache]
+
+    def __enter__(self) -> 'Api':
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all pooled HTTP sessions
 
-    def get_image_list(self, page: int = 1, per_page: int = 20) -> ImageList:
+        The instance can still be used after closing; new sessions are opened
+        on demand.
+        """
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the persistent HTTP session for the host of ``url``
+
+        Sessions are created lazily, one per scheme and host, and keep their
+        connections alive between requests.
+
+        :param url: URL to be requested
+        """
+        parts = urlsplit(url)
+        key = parts.scheme + '://' + parts.netloc
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self._pool_connections,
+                                      pool_maxsize=self._pool_maxsize)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[key] = session
+        return session
+
+    def get_image_list(self,
+                       page: int = 1,
+                       per_page: int = 20,
+                       lazy: bool = False,
+                       revalidate: bool = True) -> ImageList:
         """Return a list of user's saved images
 
         :param page: (optional) Page number (default: 1)
         :param per_page: (optional) Number of images per page
                          (default: 20, min: 1, max: 100)
+        :param lazy: (optional) Build each :class:`Image` on first access
+                     (default: false)
+        :param revalidate: (optional) With ``conditional_requests``, send a
+                           conditional request and remember the response
+                           for the next one (default: true)
         """
         url = self.api_url + '/api/images'
         params = {
             'page': page,
             'per_page': per_page
         }
-        response = self._request_url(
-            url, 'get', params=params, with_access_token=True)
-        headers, result = self._parse_and_check(response)
-        images = ImageList.from_list(result)
-        images.set_attributes_from_headers(headers)
+
+        def build(headers: MutableMapping[str, str],
+                  result: Any) -> ImageList:
+            images = ImageList.from_list(result, lazy=lazy)
+            images.set_attributes_from_headers(headers)
+            return images
+
+        images = self._get_conditional(url, build, params=params,
+                                       with_access_token=True,
+                                       remember=revalidate)
+        if self.ocr_index is not None:
+            self.ocr_index.add(images)
         return images
 
+    def iter_image_lists(self,
+                         per_page: int = 100,
+                         max_workers: int = 4,
+                         lazy: bool = False) -> Iterator[ImageList]:
+        """Iterate over every page of user's saved images
+
+        The first page is fetched to learn the number of pages, then the
+        remaining pages are prefetched concurrently by at most
+        ``max_workers`` threads. Pages are yielded in order. Responses are
+        not remembered for conditional requests, so that listing a large
+        library does not keep every page in memory.
+
+        :param per_page: (optional) Number of images per page
+                         (default: 100, min: 1, max: 100)
+        :param max_workers: (optional) Maximum number of pages fetched at
+                            the same time (default: 4)
+        :param lazy: (optional) Build each :class:`Image` on first access
+                     (default: false)
+        :raise GyazoError:
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        first = self.get_image_list(page=1, per_page=per_page, lazy=lazy,
+                                    revalidate=False)
+        yield first
+        num_pages = first.num_pages
+        if num_pages is None or num_pages <= 1:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending = deque()  # type: Deque[Future[ImageList]]
+        next_page = 2
+        try:
+            while next_page <= num_pages or pending:
+                while (next_page <= num_pages
+                       and len(pending) < max_workers * 2):
+                    pending.append(executor.submit(
+                        self.get_image_list, page=next_page,
+                        per_page=per_page, lazy=lazy, revalidate=False))
+                    next_page += 1
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def iter_images(self,
+                    per_page: int = 100,
+                    max_workers: int = 4) -> Iterator[Image]:
+        """Iterate over all of user's saved images, newest first
+
+        Pages are prefetched concurrently as described in
+        :meth:`iter_image_lists`; images are yielded lazily and in order.
+
+        :param per_page: (optional) Number of images per page
+                         (default: 100, min: 1, max: 100)
+        :param max_workers: (optional) Maximum number of pages fetched at
+                            the same time (default: 4)
+        :raise GyazoError:
+        """
+        for images in self.iter_image_lists(per_page=per_page,
+                                            max_workers=max_workers):
+            for image in images:
+                yield image
+
+    def find_images(self,
+                    created_after: Optional[datetime] = None,
+                    created_before: Optional[datetime] = None,
+                    types: Optional[Iterable[str]] = None,
+                    record_where: Optional[
+                        Callable[[Mapping[str, Any]], bool]] = None,
+                    where: Optional[Callable[[Image], bool]] = None,
+                    per_page: int = 100,
+                    max_workers: int = 4) -> Iterator[Image]:
+        """Iterate over user's saved images matching criteria, newest first
+
+        Pages are fetched lazily as in :meth:`iter_image_lists`, and only
+        images of matching records are built; see :class:`ImageQuery`.
+        Paging stops at the first image created before ``created_after``,
+        although up to ``max_workers * 2`` pages may already be prefetched
+        by then.
+
+        :param created_after: (optional) Select images created after this
+                              time (naive times are taken as UTC)
+        :param created_before: (optional) Select images created before this
+                               time (naive times are taken as UTC)
+        :param types: (optional) Select images of these types,
+                      e.g. ``['gif']``
+        :param record_where: (optional) A predicate on the JSON record of an
+                             image sent by the API
+        :param where: (optional) A predicate on :class:`Image`
+        :param per_page: (optional) Number of images per page
+                         (default: 100, min: 1, max: 100)
+        :param max_workers: (optional) Maximum number of pages fetched at
+                            the same time (default: 4)
+        :raise GyazoError:
+        """
+        query = ImageQuery(created_after=created_after,
+                           created_before=created_before, types=types,
+                           record_where=record_where, where=where)
+        pages = cast(Generator[ImageList, None, None],
+                     self.iter_image_lists(per_page=per_page,
+                                           max_workers=max_workers,
+                                           lazy=True))
+        try:
+            for image in query.filter_pages(pages):
+                yield image
+        finally:
+            pages.close()
+
     def get_image(self, image_id: str) -> Image:
         """Get an image
 
         :param image_id: Image ID
         """
+        key = 'image:' + image_id
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return Image.from_dict(cached)
         url = self.api_url + '/api/images/' + image_id
-        response = self._request_url(url, 'get', with_access_token=True)
-        headers, result = self._parse_and_check(response)
-        return Image.from_dict(result)
+
+        def build(headers: MutableMapping[str, str], result: Any) -> Image:
+            if self.cache is not None:
+                self.cache.set(key, result)
+            return Image.from_dict(result)
+
+        return self._get_conditional(url, build, with_access_token=True)
 
     def upload_image(self,
-                     image_file: BinaryIO,
+                     image_file: FileSource,
                      referer_url: Optional[str] = None,
                      title: Optional[str] = None,
                      desc: Optional[str] = None,
 
                      created_at: Optional[float] = None,
-                     collection_id: Optional[str] = None) -> Image:
+                     collection_id: Optional[str] = None,
+                     filename: Optional[str] = None,
+                     chunk_size: int = 64 * 1024,
+                     progress: Optional[ProgressCallback] = None) -> Image:
         """Upload an image
 
-        :param image_file: File-like object of an image file
+        The multipart request body is streamed, so memory use does not depend
+        on the size of the image file.
+
+        :param image_file: File-like object of an image file, a path to an
+                           image file or an iterable of byte chunks
         :param referer_url: Referer site URL
         :param title: Site title
         :param desc: Comment
         :param created_at: Image's created time in unix time
         :param collection_id: Collection ID
+        :param filename: (optional) File name sent with the image
+                         (default: the base name of the file)
+        :param chunk_size: (optional) Size of chunks read from the file in
+                           bytes (default: 65536)
+        :param progress: (optional) A callable receiving the number of bytes
+                         sent so far and the total request size (``None`` if
+                         unknown)
         """
+        digest = None
+        if self.upload_index is not None:
+            from .dedup import hash_file
+
+            digest = hash_file(image_file, chunk_size=chunk_size)
+            if digest is not None:
+                previous = self.upload_index.get(digest)
+                if previous is not None:
+                    return previous
         url = self.upload_url + '/api/upload'
-        data = {}
-        if referer_url is not None:
-            data['referer_url'] = referer_url
-        if title is not None:
-            data['title'] = title
-        if desc is not None:
-            data['desc'] = desc
-        if created_at is not None:
-            data['created_at'] = str(created_at)
-        if collection_id is not None:
-            data['collection_id'] = collection_id
-        files = {
-            'imagedata': image_file
-        }
+        body = _upload_body(image_file, referer_url, title, desc, created_at,
+                            collection_id, filename, chunk_size, progress)
         response = self._request_url(
-            url, 'post', data=data, files=files, with_access_token=True)
+            url, 'post', data=body,
+            headers={'Content-Type': body.content_type},
+            with_access_token=True)
         headers, result = self._parse_and_check(response)
-        return Image.from_dict(result)
+        image = Image.from_dict(result)
+        if digest is not None and self.upload_index is not None:
+            self.upload_index.add(digest, image)
+        return image
+
+    def upload_images(
+            self,
+            items: Iterable[Union[UploadItem, str, BinaryIO]],
+            max_workers: int = 4
+    ) -> Iterator[BatchResult[UploadItem, Image]]:
+        """Upload many images concurrently
+
+        At most ``max_workers`` uploads are in flight at any time. Results are
+        yielded as uploads complete, so the order may differ from ``items``.
+        A failed upload is reported in its result instead of aborting the
+        batch.
+
+        :param items: Upload items, or paths or file-like objects of image
+                      files to be uploaded without metadata
+        :param max_workers: (optional) Maximum number of uploads in flight
+                            (default: 4)
+        """
+        upload_items = (
+            i if isinstance(i, UploadItem) else UploadItem(i) for i in items
+        )
+        return run_concurrently(self._upload_item, upload_items, max_workers)
+
+    def _upload_item(self, item: UploadItem) -> Image:
+        return self.upload_image(item.image, **item.metadata())
 
     def delete_image(self, image_id: str) -> Image:
         """Delete an image
@@ -105,13 +421,146 @@ class Api:
         url = self.api_url + '/api/images/' + image_id
         response = self._request_url(url, 'delete', with_access_token=True)
         headers, result = self._parse_and_check(response)
-        return Image.from_dict(result)
+        image = Image.from_dict(result)
+        if self.upload_index is not None:
+            self.upload_index.remove_image(image_id)
+        if self.ocr_index is not None:
+            self.ocr_index.remove([image_id])
+        if self.cache is not None:
+            self.cache.delete('image:' + image_id)
+            if image.permalink_url:
+                self.cache.delete('oembed:' + image.permalink_url)
+        return image
+
+    def delete_images(
+            self,
+            images: Iterable[Union[str, Image]],
+            max_workers: int = 4,
+            dry_run: bool = False,
+            created_after: Optional[datetime] = None,
+            created_before: Optional[datetime] = None
+    ) -> Iterator[BatchResult[str, Image]]:
+        """Delete many images concurrently
+
+        At most ``max_workers`` deletes are in flight at any time, and every
+        request draws from :attr:`rate_limiter`, so the budget is shared with
+        other calls on this instance. Results are yielded as deletes
+        complete; a failed delete is reported in its result instead of
+        aborting the batch.
+
+        Images can be selected by creation time. Bare image IDs are then
+        looked up with :meth:`get_image` first, and images outside the range
+        are skipped without a result.
+
+        :param images: Image IDs or images, e.g. an :class:`ImageList`
+        :param max_workers: (optional) Maximum number of deletes in flight
+                            (default: 4)
+        :param dry_run: (optional) Report the images which would be deleted
+                        without deleting them (default: false)
+        :param created_after: (optional) Only delete images created after
+                              this time (naive times are taken as UTC)
+        :param created_before: (optional) Only delete images created before
+                               this time (naive times are taken as UTC)
+        """
+        query = ImageQuery(created_after=created_after,
+                           created_before=created_before)
+        filtered = created_after is not None or created_before is not None
+
+        def targets() -> Iterator[Tuple[str, Optional[Image]]]:
+            for item in images:
+                if isinstance(item, str):
+                    yield item, None
+                    continue
+                if filtered and not query.match(item):
+                    continue
+                if item.image_id:
+                    yield item.image_id, item
+
+        def delete(target: Tuple[str, Optional[Image]]) -> Optional[Image]:
+            image_id, image = target
+            if image is None and (filtered or dry_run):
+                image = self.get_image(image_id)
+                if filtered and not query.match(image):
+                    return None
+            if dry_run:
+                return image
+            return self.delete_image(image_id)
+
+        for result in run_concurrently(delete, targets(), max_workers):
+            if result.ok and result.result is None:
+                continue
+            yield BatchResult(result.item[0], result=result.result,
+                              error=result.error)
+
+    def download_images(self,
+                        images: Iterable[Image],
+                        directory: str,
+                        thumbnails: bool = False,
+                        max_workers: int = 8,
+                        skip_existing: bool = True,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE
+                        ) -> DownloadReport:
+        """Download many images concurrently into a directory
+
+        Files are named after :attr:`Image.filename` (and
+        :attr:`Image.thumb_filename` for thumbnails), streamed over pooled
+        connections and renamed into place only once complete. Failed
+        downloads are reported instead of aborting the others.
+
+        :param images: Images to be downloaded, e.g. an :class:`ImageList` or
+                       :meth:`iter_images`
+        :param directory: Target directory, created if it does not exist
+        :param thumbnails: (optional) Download thumbnails as well
+                           (default: false)
+        :param max_workers: (optional) Maximum number of downloads in flight
+                            (default: 8)
+        :param skip_existing: (optional) Skip files already present in the
+                              directory (default: true)
+        :param chunk_size: (optional) Size of each chunk in bytes
+                           (default: 65536)
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = DownloadReport()
+
+        def targets() -> Iterator[Tuple[str, str]]:
+            for image in images:
+                pairs = [(image.url, image.filename)]
+                if thumbnails:
+                    pairs.append((image.thumb_url, image.thumb_filename))
+                for url, filename in pairs:
+                    if not url or not filename:
+                        continue
+                    path = os.path.join(directory, filename)
+                    if skip_existing and os.path.exists(path):
+                        report.skipped += 1
+                        continue
+                    yield url, path
+
+        def download(target: Tuple[str, str]) -> int:
+            url, path = target
+            return _download_to_path(url, path, chunk_size,
+                                     self.get_session(url))
+
+        started = time.monotonic()
+        for result in run_concurrently(download, targets(), max_workers):
+            if result.error is None:
+                report.downloaded += 1
+                report.bytes += result.result or 0
+            else:
+                report.failures.append(result)
+        report.elapsed = time.monotonic() - started
+        return report
 
     def get_oembed(self, url: str) -> Dict[str, Any]:
         """Return an oEmbed format json dictionary
 
         :param url: Image page URL (ex. http://gyazo.com/xxxxx)
         """
+        key = 'oembed:' + url
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached)
         api_url = self.api_url + '/api/oembed'
         parameters = {
             'url': url
@@ -120,26 +569,122 @@ class Api:
         _, result = (
             self._parse_and_check(response)
         )  # type: Tuple[Any, Dict[str, Any]]
+        if self.cache is not None:
+            self.cache.set(key, dict(result))
         return result
 
+    def download_image(self,
+                       image: Image,
+                       thumbnail: bool = False) -> Optional[bytes]:
+        """Download an image file over a pooled connection
+
+        With a ``blob_cache`` a cached file is returned without any request;
+        file names on Gyazo are derived from the content, so cached files
+        never need to be revalidated. Downloaded bytes are not kept in
+        memory by this instance.
+
+        :param image: An image
+        :param thumbnail: (optional) Download the thumbnail instead
+                          (default: false)
+        :raise GyazoError:
+        """
+        url = image.thumb_url if thumbnail else image.url
+        key = image.thumb_filename if thumbnail else image.filename
+        if url is None or url == '' or key is None:
+            return None
+        if self.blob_cache is not None:
+            data = self.blob_cache.get(key)
+            if data is not None:
+                return data
+
+        response = self._request_url(url, 'get')
+        try:
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise GyazoError(str(e), status_code=response.status_code)
+        data = response.content
+        if self.blob_cache is not None:
+            self.blob_cache.put(key, data)
+        return data
+
+    def _get_conditional(self,
+                         url: str,
+                         build: Callable[[MutableMapping[str, str], Any], T],
+                         params: Optional[Dict[str, Any]] = None,
+                         with_access_token: bool = False,
+                         remember: bool = True) -> T:
+        """Send a GET request, revalidating a previous response if possible
+
+        The raw JSON and headers of a response carrying an ``ETag`` or
+        ``Last-Modified`` header are remembered. The next request for the
+        same URL sends ``If-None-Match``/``If-Modified-Since``, and on 304 Not
+        Modified the result is built again from the remembered JSON, so
+        callers never share built objects.
+
+        :param url: URL
+        :param build: A function building the result from response headers
+                      and parsed JSON
+        :param params: URL parameters
+        :param with_access_token: send request with with_access_token
+                                  (default: false)
+        :param remember: (optional) Revalidate and remember the response
+                         (default: true)
+        :raise GyazoError:
+        """
+        validators = self._validators if remember else None
+        key = url
+        if params:
+            key += '?' + urlencode(sorted(params.items()))
+        entry = validators.get(key) if validators is not None else None
+
+        headers = {}  # type: Dict[str, str]
+        if entry is not None:
+            etag, last_modified, cached_headers, cached_result = entry
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self._request_url(url, 'get', params=params,
+                                     headers=headers,
+                                     with_access_token=with_access_token)
+        if entry is not None and response.status_code == 304:
+            return build(cached_headers, cached_result)
+
+        response_headers, result = self._parse_and_check(response)
+
+        if validators is not None:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                validators.set(key, (etag, last_modified,
+                                     CaseInsensitiveDict(response_headers),
+                                     result))
+            elif entry is not None:
+                validators.delete(key)
+        return build(response_headers, result)
+
     def _request_url(self,
                      url: str,
                      method: str,
                      params: Optional[Dict[str, Any]] = None,
-                     data: Optional[Dict[str, Any]] = None,
+                     data: Optional[Any] = None,
                      files: Optional[Dict[str, BinaryIO]] = None,
+                     headers: Optional[Dict[str, str]] = None,
                      with_client_id: bool = False,
                      with_access_token: bool = False) -> Response:
         """Send HTTP request
 
         :param url: URL
         :param method: HTTP method (get, post or delete)
+        :param data: form fields or a streamed request body
+        :param headers: additional HTTP headers
         :param with_client_id: send request with client_id (default: false)
         :param with_access_token: send request with with_access_token
                                   (default: false)
         :raise GyazoError:
         """
-        headers = {}  # type: Dict[str, Any]
+        headers = dict(headers or {})
         if data is None:
             data = {}
         if params is None:
@@ -151,27 +696,171 @@ class Api:
         if with_access_token and self._access_token is not None:
             headers['Authorization'] = "Bearer " + self._access_token
 
-        try:
-            return requests.request(method, url,
-                                    params=params,
-                                    data=data,
-                                    files=files,
-                                    headers=headers)
-        except requests.RequestException as e:
-            raise GyazoError(str(e))
+        attempts = _Attempts(self, method, url, _body_size(data, files))
+        while True:
+            self.rate_limiter.acquire()
+            attempts.start()
+            try:
+                response = self.get_session(url).request(
+                    method, url,
+                    params=params,
+                    data=data,
+                    files=files,
+                    headers=headers,
+                    timeout=self.timeout)
+            except requests.RequestException as e:
+                delay = attempts.failed(e)
+                if delay is None:
+                    raise GyazoError(str(e))
+                time.sleep(delay)
+                continue
+
+            delay = attempts.finished(response)
+            if delay is None:
+                return response
+            response.close()
+            if delay > 0:
+                time.sleep(delay)
 
     def _parse_and_check(
             self,
             data: Response
     ) -> Tuple[MutableMapping[str, str], Any]:
+        return data.headers, _check_response(data.status_code, data.headers,
+                                             data.reason, data.json)
+
+
+def _check_response(status_code: int,
+                    headers: Mapping[str, str],
+                    reason: Optional[str],
+                    parse_json: Callable[[], Any]) -> Any:
+    """Return the parsed JSON of a successful API response
+
+    :param status_code: HTTP status code
+    :param headers: HTTP headers
+    :param reason: HTTP reason phrase
+    :param parse_json: A function parsing the response body
+    :raise GyazoError: if the status code is 400 or more
+    """
+    if status_code >= 400:
+        # Proxies and load balancers may answer with an HTML page
+        message = reason or 'Error'
         try:
-            headers = data.headers
-            json_data = data.json()
-        except Exception as e:
-            raise e
+            error_data = parse_json()
+        except ValueError:
+            error_data = None
+        if isinstance(error_data, dict):
+            message = error_data.get('message', message)
+        raise GyazoError(
+            message,
+            status_code=status_code,
+            retry_after=parse_retry_after(headers.get('Retry-After')))
+    return parse_json()
+
+
+def _upload_body(image_file: FileSource,
+                 referer_url: Optional[str],
+                 title: Optional[str],
+                 desc: Optional[str],
+                 created_at: Optional[float],
+                 collection_id: Optional[str],
+                 filename: Optional[str],
+                 chunk_size: int,
+                 progress: Optional[ProgressCallback]) -> MultipartEncoder:
+    """Return the streamed multipart body of an upload request"""
+    data = {}
+    if referer_url is not None:
+        data['referer_url'] = referer_url
+    if title is not None:
+        data['title'] = title
+    if desc is not None:
+        data['desc'] = desc
+    if created_at is not None:
+        data['created_at'] = str(created_at)
+    if collection_id is not None:
+        data['collection_id'] = collection_id
+    return MultipartEncoder(data, 'imagedata', image_file,
+                            filename=filename,
+                            chunk_size=chunk_size,
+                            progress=progress)
+
+
+class _Attempts:
+    """Retry decisions and hook calls for the attempts of one request
+
+    The transport sends each attempt itself, after waiting for the rate
+    limiter, and sleeps for the delays returned here.
+    """
+
+    def __init__(self, api: Api, method: str, url: str,
+                 body_size: Optional[int]) -> None:
+        self._api = api
+        self._method = method
+        self._url = url
+        self._body_size = body_size
+        # Only reads are retried; uploads and deletes are sent once
+        self._retries = (
+            api.retry.max_retries if method.lower() == 'get' else 0
+        )  # type: int
+        self._attempt = 0
+        self._info = None  # type: Optional[RequestInfo]
+        self._started = 0.0
+
+    def start(self) -> None:
+        """Call hooks before an attempt is sent"""
+        if self._api.hooks:
+            self._info = RequestInfo(self._method, self._url, self._attempt,
+                                     self._body_size)
+            for hook in self._api.hooks:
+                hook.before_request(self._info)
+            self._started = time.monotonic()
+
+    def failed(self, error: Exception) -> Optional[float]:
+        """Handle an attempt that raised a connection error
+
+        :return: Seconds to sleep before the next attempt, or ``None`` if
+                 the request must fail
+        """
+        if self._info is not None:
+            elapsed = time.monotonic() - self._started
+            for hook in self._api.hooks:
+                hook.on_error(self._info, error, elapsed)
+        if self._attempt >= self._retries:
+            return None
+        self._attempt += 1
+        return self._api.retry.delay(self._attempt)
+
+    def finished(self, response: Any) -> Optional[float]:
+        """Handle the response of an attempt
+
+        :return: Seconds to sleep before the next attempt, or ``None`` if
+                 the response is final
+        """
+        api = self._api
+        if self._info is not None:
+            elapsed = time.monotonic() - self._started
+            for hook in api.hooks:
+                hook.after_response(self._info, response, elapsed)
+        api.rate_limiter.update(response.status_code, response.headers)
+        if (self._attempt >= self._retries
+                or response.status_code not in api.retry.retry_statuses):
+            return None
+        self._attempt += 1
+        if parse_retry_after(response.headers.get('Retry-After')) is not None:
+            # The rate limiter already holds back every request until the
+            # time requested by the server
+            return 0.0
+        return api.retry.delay(self._attempt)
 
-        if data.status_code >= 400:
-            message = json_data.get('message', 'Error')
-            raise GyazoError(message)
 
-        return headers, json_data
+def _body_size(data: Any,
+               files: Optional[Dict[str, BinaryIO]]) -> Optional[int]:
+    if files:
+        return None
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, MultipartEncoder):
+        return data.length
+    if not data:
+        return 0
+    return None
@@ -0,0 +1,159 @@
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from typing import (Any, BinaryIO, Callable, Dict, Generic, Iterable,
+                    Iterator, List, Optional, Tuple, TypeVar, Union)
+
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class UploadItem:
+    """A class representing an image file to be uploaded with its metadata"""
+
+    def __init__(self,
+                 image: Union[str, BinaryIO],
+                 referer_url: Optional[str] = None,
+                 title: Optional[str] = None,
+                 desc: Optional[str] = None,
+                 created_at: Optional[float] = None,
+                 collection_id: Optional[str] = None) -> None:
+        """
+        :param image: Path or file-like object of an image file
+        :param referer_url: Referer site URL
+        :param title: Site title
+        :param desc: Comment
+        :param created_at: Image's created time in unix time
+        :param collection_id: Collection ID
+        """
+        #: Path or file-like object of an image file
+        self.image = image  # type: Union[str, BinaryIO]
+        #: Referer site URL
+        self.referer_url = referer_url  # type: Optional[str]
+        #: Site title
+        self.title = title  # type: Optional[str]
+        #: Comment
+        self.desc = desc  # type: Optional[str]
+        #: Image's created time in unix time
+        self.created_at = created_at  # type: Optional[float]
+        #: Collection ID
+        self.collection_id = collection_id  # type: Optional[str]
+
+    def metadata(self) -> Dict[str, Any]:
+        """Return keyword arguments for :meth:`gyazo.Api.upload_image`"""
+        return {
+            'referer_url': self.referer_url,
+            'title': self.title,
+            'desc': self.desc,
+            'created_at': self.created_at,
+            'collection_id': self.collection_id,
+        }
+
+
+class BatchResult(Generic[T, R]):
+    """A class representing the outcome of one item of a batch operation"""
+
+    def __init__(self,
+                 item: T,
+                 result: Optional[R] = None,
+                 error: Optional[Exception] = None) -> None:
+        #: The input item
+        self.item = item  # type: T
+        #: The result if the operation succeeded
+        self.result = result  # type: Optional[R]
+        #: The exception raised if the operation failed
+        self.error = error  # type: Optional[Exception]
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return 'BatchResult({!r}, error={!r})'.format(
+                self.item, self.error)
+        return 'BatchResult({!r}, result={!r})'.format(
+            self.item, self.result)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the operation succeeded or not
+
+        :getter: Return true if the operation succeeded
+        """
+        return self.error is None
+
+
+class DownloadReport:
+    """A class representing the outcome of a bulk download"""
+
+    def __init__(self) -> None:
+        #: The number of files downloaded
+        self.downloaded = 0  # type: int
+        #: The number of files skipped because they already existed
+        self.skipped = 0  # type: int
+        #: The number of bytes downloaded
+        self.bytes = 0  # type: int
+        #: Elapsed time in seconds
+        self.elapsed = 0.0  # type: float
+        #: Failed downloads; each item is a ``(url, path)`` tuple
+        self.failures = []  # type: List[BatchResult[Tuple[str, str], int]]
+
+    def __repr__(self) -> str:
+        return ('DownloadReport(downloaded={}, skipped={}, failed={}, '
+                'bytes={}, elapsed={:.3f})').format(
+                    self.downloaded, self.skipped, len(self.failures),
+                    self.bytes, self.elapsed)
+
+    @property
+    def throughput(self) -> float:
+        """Download throughput in bytes per second
+
+        :getter: Return the number of bytes downloaded per second
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes / self.elapsed
+
+
+def run_concurrently(func: Callable[[T], R],
+                     items: Iterable[T],
+                     max_workers: int) -> Iterator[BatchResult[T, R]]:
+    """Apply ``func`` to every item on a bounded thread pool
+
+    Items are consumed lazily so that at most ``max_workers`` calls are in
+    flight at any time. Results are yielded as they complete; an exception
+    raised for one item is reported in its result and does not stop the
+    others.
+
+    :param func: A function called with each item
+    :param items: Items to process
+    :param max_workers: Maximum number of calls in flight
+    """
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1')
+    iterator = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    in_flight = {}  # type: Dict[Future[R], T]
+
+    def submit_next() -> bool:
+        for item in iterator:
+            in_flight[executor.submit(func, item)] = item
+            return True
+        return False
+
+    try:
+        while len(in_flight) < max_workers and submit_next():
+            pass
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield BatchResult(item, result=future.result())
+                elif isinstance(error, Exception):
+                    yield BatchResult(item, error=error)
+                else:
+                    raise error
+                submit_next()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,192 @@
+import mmap
+import os
+import tempfile
+import threading
+from typing import List, Optional, Tuple
+
+
+class BlobCache:
+    """A size-bounded on-disk cache of downloaded image files
+
+    Files are keyed by their file name (e.g. :attr:`gyazo.Image.filename`),
+    which is derived from the image content on Gyazo. Writes are atomic, so
+    several processes may share one directory. When the cache grows over
+    ``max_bytes``, the least recently used files are evicted until it is
+    back under ``low_water`` times ``max_bytes``, so that the directory is
+    not scanned again on every following write.
+    """
+
+    def __init__(self, directory: str,
+                 max_bytes: int = 1024 * 1024 * 1024,
+                 low_water: float = 0.9) -> None:
+        """
+        :param directory: Cache directory, created if it does not exist
+        :param max_bytes: (optional) Maximum total size of cached files in
+                          bytes (default: 1 GiB)
+        :param low_water: (optional) Fraction of ``max_bytes`` the cache is
+                          brought down to by eviction (default: 0.9)
+        """
+        if not 0 <= low_water <= 1:
+            raise ValueError('low_water must be between 0 and 1')
+        #: Cache directory
+        self.directory = directory  # type: str
+        #: Maximum total size of cached files in bytes
+        self.max_bytes = max_bytes  # type: int
+        #: Fraction of ``max_bytes`` the cache is brought down to by eviction
+        self.low_water = low_water  # type: float
+        #: The number of lookups that found a file
+        self.hits = 0  # type: int
+        #: The number of lookups that did not find a file
+        self.misses = 0  # type: int
+        #: The number of bytes read from the cache
+        self.bytes_served = 0  # type: int
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @property
+    def size(self) -> int:
+        """Total size of cached files in bytes
+
+        :getter: Return the size known to this instance
+        """
+        return self._size
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The ratio of lookups that found a file
+
+        :getter: Return the hit rate, or ``None`` if nothing was looked up
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return None
+        return self.hits / lookups
+
+    def path(self, key: str) -> str:
+        """Return the path of a cached file
+
+        :param key: Cache key, e.g. an image file name
+        """
+        if not key or key in ('.', '..') or '/' in key or os.sep in key:
+            raise ValueError('invalid cache key: ' + repr(key))
+        return os.path.join(self.directory, key[:2], key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def open(self, key: str) -> Optional[mmap.mmap]:
+        """Return a read-only memory map of a cached file
+
+        The file is not copied into memory; pages are loaded on access.
+
+        :param key: Cache key
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty files cannot be mapped and are never stored
+            with self._lock:
+                self.misses += 1
+            return None
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += len(mapped)
+        return mapped
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return a copy of the content of a cached file
+
+        The whole file is read into a new ``bytes`` object. Use :meth:`open`
+        to read a large file without copying it.
+
+        :param key: Cache key
+        """
+        mapped = self.open(key)
+        if mapped is None:
+            return None
+        with mapped:
+            return mapped[:]
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a file atomically
+
+        :param key: Cache key
+        :param data: File content; empty content is not stored
+        """
+        if not data:
+            return
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        with self._lock:
+            self._size += len(data) - previous
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        """Remove a cached file if it exists
+
+        :param key: Cache key
+        """
+        path = self.path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def evict(self) -> None:
+        """Remove least recently used files down to the low-water mark"""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        target = int(self.max_bytes * self.low_water)
+        for _, path, size in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def _touch(self, path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
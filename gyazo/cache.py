@@ -0,0 +1,117 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+
+_Entry = Tuple[Optional[float], Any]
+
+
+class Cache:
+    """Base class for response caches used by :class:`gyazo.Api`
+
+    Values are JSON-compatible objects, so a backend may serialize them to
+    share a cache between processes (e.g. on memcached or Redis). Subclasses
+    must implement :meth:`get`, :meth:`set`, :meth:`delete` and
+    :meth:`clear`.
+    """
+
+    #: The number of lookups that found a value
+    hits = 0  # type: int
+    #: The number of lookups that did not find a value
+    misses = 0  # type: int
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a cached value or ``None``
+
+        :param key: Cache key
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value
+
+        :param key: Cache key
+        :param value: A JSON-compatible value
+        :param ttl: (optional) Time to live in seconds
+                    (default: the cache's default)
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove a value if it exists
+
+        :param key: Cache key
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove all values"""
+        raise NotImplementedError
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """The ratio of lookups that found a value
+
+        :getter: Return the hit rate, or ``None`` if nothing was looked up
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return None
+        return self.hits / lookups
+
+
+class LRUCache(Cache):
+    """A thread-safe in-memory cache with LRU eviction and TTL expiry"""
+
+    def __init__(self, maxsize: int = 1024,
+                 ttl: Optional[float] = None) -> None:
+        """
+        :param maxsize: (optional) Maximum number of entries (default: 1024)
+        :param ttl: (optional) Default time to live in seconds
+                    (default: no expiry)
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        #: Maximum number of entries
+        self.maxsize = maxsize  # type: int
+        #: Default time to live in seconds
+        self.ttl = ttl  # type: Optional[float]
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # type: OrderedDict[str, _Entry]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,195 @@
+import argparse
+import glob
+import os
+import sys
+from typing import IO, Any, Iterator, List, Optional
+
+from .api import Api
+from .batch import UploadItem
+from .error import GyazoError
+from .image import parse_datetime
+from .serializer import Serializer, get_serializer, write_ndjson
+
+
+def _expand(patterns: List[str]) -> Iterator[str]:
+    for pattern in patterns:
+        paths = sorted(glob.glob(os.path.expanduser(pattern), recursive=True))
+        if not paths and os.path.exists(pattern):
+            paths = [pattern]
+        if not paths:
+            print('gyazo: no files match ' + pattern, file=sys.stderr)
+        for path in paths:
+            if os.path.isfile(path):
+                yield path
+
+
+def _read_ids(values: List[str]) -> Iterator[str]:
+    for value in values:
+        if value == '-':
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield line
+        else:
+            yield value
+
+
+def _writer(serializer: Serializer, f: IO[Any]) -> Any:
+    out = getattr(f, 'buffer', f)
+
+    def write(obj: Any) -> None:
+        out.write(serializer.dumps(obj) + b'\n')
+        out.flush()
+    return write
+
+
+def _upload(api: Api, args: argparse.Namespace) -> int:
+    from .dedup import UploadIndex
+
+    if args.dedup_index is not None:
+        api.upload_index = UploadIndex(args.dedup_index)
+    items = (UploadItem(path, referer_url=args.referer_url,
+                        title=args.title, desc=args.desc,
+                        collection_id=args.collection_id)
+             for path in _expand(args.patterns))
+    write = _writer(get_serializer(), sys.stdout)
+    failed = 0
+    for result in api.upload_images(items, max_workers=args.concurrency):
+        if result.result is not None:
+            record = result.result.to_dict()
+            record['path'] = result.item.image
+            write(record)
+        else:
+            failed += 1
+            print('gyazo: failed to upload {}: {}'.format(
+                result.item.image, result.error), file=sys.stderr)
+    if api.upload_index is not None:
+        api.upload_index.close()
+    return 1 if failed else 0
+
+
+def _list(api: Api, args: argparse.Namespace) -> int:
+    pages = api.iter_image_lists(per_page=args.per_page,
+                                 max_workers=args.concurrency, lazy=True)
+    out = getattr(sys.stdout, 'buffer', sys.stdout)
+    write_ndjson(pages, out)
+    out.flush()
+    return 0
+
+
+def _mirror(api: Api, args: argparse.Namespace) -> int:
+    images = api.iter_images(per_page=args.per_page)
+    report = api.download_images(images, args.directory,
+                                 thumbnails=args.thumbnails,
+                                 max_workers=args.concurrency,
+                                 skip_existing=not args.overwrite)
+    for failure in report.failures:
+        print('gyazo: failed to download {}: {}'.format(
+            failure.item[0], failure.error), file=sys.stderr)
+    print('{} downloaded, {} skipped, {} failed, {:.1f} MiB/s'.format(
+        report.downloaded, report.skipped, len(report.failures),
+        report.throughput / 2 ** 20), file=sys.stderr)
+    return 1 if report.failures else 0
+
+
+def _delete(api: Api, args: argparse.Namespace) -> int:
+    write = _writer(get_serializer(), sys.stdout)
+    failed = 0
+    for result in api.delete_images(_read_ids(args.ids),
+                                    max_workers=args.concurrency,
+                                    dry_run=args.dry_run,
+                                    created_after=args.after,
+                                    created_before=args.before):
+        if result.result is not None:
+            write(result.result.to_dict())
+        else:
+            failed += 1
+            print('gyazo: failed to delete {}: {}'.format(
+                result.item, result.error), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the parser of command line arguments"""
+    parser = argparse.ArgumentParser(
+        prog='gyazo', description='Command line interface for Gyazo API')
+    parser.add_argument('--access-token',
+                        default=os.environ.get('GYAZO_ACCESS_TOKEN'),
+                        help='API access token '
+                             '(default: $GYAZO_ACCESS_TOKEN)')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='request timeout in seconds (default: 60)')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    upload = subparsers.add_parser(
+        'upload', help='upload image files',
+        description='Upload image files and print the images as JSON Lines')
+    upload.add_argument('patterns', nargs='+', metavar='PATTERN',
+                        help='paths or glob patterns, ** matches directories')
+    upload.add_argument('-j', '--concurrency', type=int, default=4,
+                        help='uploads in flight (default: 4)')
+    upload.add_argument('--title')
+    upload.add_argument('--desc')
+    upload.add_argument('--referer-url')
+    upload.add_argument('--collection-id')
+    upload.add_argument('--dedup-index', metavar='PATH',
+                        help='skip files uploaded before, as recorded in '
+                             'this SQLite file')
+    upload.set_defaults(func=_upload)
+
+    list_ = subparsers.add_parser(
+        'list', help='print all images as JSON Lines',
+        description='Print all images, newest first, as JSON Lines')
+    list_.add_argument('--per-page', type=int, default=100)
+    list_.add_argument('-j', '--concurrency', type=int, default=4,
+                       help='pages fetched at the same time (default: 4)')
+    list_.set_defaults(func=_list)
+
+    mirror = subparsers.add_parser(
+        'mirror', help='download all images into a directory',
+        description='Download all images into a directory')
+    mirror.add_argument('directory')
+    mirror.add_argument('--per-page', type=int, default=100)
+    mirror.add_argument('-j', '--concurrency', type=int, default=8,
+                        help='downloads in flight (default: 8)')
+    mirror.add_argument('--thumbnails', action='store_true',
+                        help='download thumbnails as well')
+    mirror.add_argument('--overwrite', action='store_true',
+                        help='download files which already exist')
+    mirror.set_defaults(func=_mirror)
+
+    delete = subparsers.add_parser(
+        'delete', help='delete images',
+        description='Delete images and print them as JSON Lines')
+    delete.add_argument('ids', nargs='+', metavar='IMAGE_ID',
+                        help='image IDs, or - to read IDs from stdin')
+    delete.add_argument('-j', '--concurrency', type=int, default=4,
+                        help='deletes in flight (default: 4)')
+    delete.add_argument('--dry-run', action='store_true',
+                        help='print the images without deleting them')
+    delete.add_argument('--after', type=parse_datetime, metavar='TIME',
+                        help='only delete images created after this time')
+    delete.add_argument('--before', type=parse_datetime, metavar='TIME',
+                        help='only delete images created before this time')
+    delete.set_defaults(func=_delete)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the ``gyazo`` command
+
+    :param argv: (optional) Command line arguments
+                 (default: ``sys.argv[1:]``)
+    :return: Exit status
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        with Api(access_token=args.access_token, timeout=args.timeout,
+                 pool_maxsize=max(args.concurrency, 10)) as api:
+            return int(args.func(api, args))
+    except GyazoError as e:
+        print('gyazo: ' + str(e), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
@@ -0,0 +1,245 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Mapping, Optional, Union
+
+from .image import Image, ImageList, parse_datetime
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+
+#: Names of the exported columns
+COLUMNS = (
+    'image_id',
+    'created_at',
+    'type',
+    'url',
+    'thumb_url',
+    'permalink_url',
+    'ocr_locale',
+    'ocr_description',
+)
+
+
+def _epoch_millis(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def _or_none(value: Any) -> Optional[str]:
+    return value if value else None
+
+
+class ImageColumns:
+    """Image metadata stored column by column
+
+    ``created_at`` is stored as milliseconds since the epoch in a contiguous
+    ``array('q')``, and the other columns as lists of strings (``None`` for
+    missing values). Columns can be converted to NumPy structured arrays or
+    Arrow tables, and written to Parquet or Arrow IPC files, with the
+    optional ``numpy`` and ``pyarrow`` packages.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self) -> None:
+        #: Image IDs
+        self.image_id = []  # type: List[Optional[str]]
+        #: Creation times in milliseconds since the epoch (0 if unknown)
+        self.created_at = array('q')  # type: array[int]
+        #: Image types
+        self.type = []  # type: List[Optional[str]]
+        #: Image URLs
+        self.url = []  # type: List[Optional[str]]
+        #: Thumbnail URLs
+        self.thumb_url = []  # type: List[Optional[str]]
+        #: Permalink URLs
+        self.permalink_url = []  # type: List[Optional[str]]
+        #: Locales of OCR results
+        self.ocr_locale = []  # type: List[Optional[str]]
+        #: Texts of OCR results
+        self.ocr_description = []  # type: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.created_at)
+
+    @staticmethod
+    def from_images(images: Iterable[Image]) -> 'ImageColumns':
+        """Create a new instance from images
+
+        The raw records of a lazy :class:`ImageList` are read directly,
+        without building :class:`Image` instances.
+
+        :param images: Images, e.g. an :class:`ImageList`
+        """
+        columns = ImageColumns()
+        columns.extend(images)
+        return columns
+
+    def extend(self, images: Iterable[Image]) -> None:
+        """Append images
+
+        :param images: Images, e.g. an :class:`ImageList`
+        """
+        if isinstance(images, ImageList) and images._records is not None:
+            for n, record in enumerate(images._records):
+                if record is None:
+                    self.append(images[n])
+                else:
+                    self.append_record(record)
+            return
+        for image in images:
+            self.append(image)
+
+    def append(self, image: Image) -> None:
+        """Append an image
+
+        :param image: An image
+        """
+        ocr = image.ocr or {}
+        self.image_id.append(_or_none(image.image_id))
+        self.created_at.append(_epoch_millis(image.created_at))
+        self.type.append(_or_none(image.type))
+        self.url.append(_or_none(image.url))
+        self.thumb_url.append(_or_none(image.thumb_url))
+        self.permalink_url.append(_or_none(image.permalink_url))
+        self.ocr_locale.append(_or_none(ocr.get('locale')))
+        self.ocr_description.append(_or_none(ocr.get('description')))
+
+    def append_record(self, record: Mapping[str, Any]) -> None:
+        """Append an image from a JSON record sent by the API
+
+        :param record: A JSON dict
+        """
+        created_at = record.get('created_at')
+        ocr = record.get('ocr') or {}
+        self.image_id.append(_or_none(record.get('image_id')))
+        self.created_at.append(
+            _epoch_millis(parse_datetime(created_at)) if created_at else 0)
+        self.type.append(_or_none(record.get('type')))
+        self.url.append(_or_none(record.get('url')))
+        self.thumb_url.append(_or_none(record.get('thumb_url')))
+        self.permalink_url.append(_or_none(record.get('permalink_url')))
+        self.ocr_locale.append(_or_none(ocr.get('locale')))
+        self.ocr_description.append(_or_none(ocr.get('description')))
+
+    def clear(self) -> None:
+        """Remove all rows"""
+        for name in COLUMNS:
+            del getattr(self, name)[:]
+
+    def to_numpy(self) -> Any:
+        """Return a NumPy structured array
+
+        ``created_at`` is an ``int64`` field; the other fields are Python
+        object fields. Requires ``numpy``.
+        """
+        import numpy
+
+        dtype = [(name, 'i8' if name == 'created_at' else 'O')
+                 for name in COLUMNS]
+        result = numpy.empty(len(self), dtype=dtype)
+        result['created_at'] = numpy.frombuffer(self.created_at,
+                                                dtype='i8')
+        for name in COLUMNS:
+            if name != 'created_at':
+                result[name] = getattr(self, name)
+        return result
+
+    def to_arrow(self) -> Any:
+        """Return a ``pyarrow.Table``
+
+        ``created_at`` is a ``timestamp[ms, tz=UTC]`` column. Requires
+        ``pyarrow``.
+        """
+        import pyarrow
+
+        arrays = []
+        for name in COLUMNS:
+            if name == 'created_at':
+                arrays.append(pyarrow.array(self.created_at,
+                                            type=pyarrow.int64())
+                              .cast(pyarrow.timestamp('ms', tz='UTC')))
+            else:
+                arrays.append(pyarrow.array(getattr(self, name),
+                                            type=pyarrow.string()))
+        return pyarrow.Table.from_arrays(arrays, names=list(COLUMNS))
+
+
+def _iter_tables(pages: Iterable[Iterable[Image]],
+                 rows_per_batch: int) -> Iterable[Any]:
+    columns = ImageColumns()
+    for page in pages:
+        columns.extend(page)
+        if len(columns) >= rows_per_batch:
+            yield columns.to_arrow()
+            columns.clear()
+    if len(columns) > 0:
+        yield columns.to_arrow()
+
+
+def write_parquet(pages: Iterable[Iterable[Image]],
+                  path: Union[str, Any],
+                  rows_per_batch: int = 10000,
+                  **kwargs: Any) -> int:
+    """Write images to a Parquet file page by page
+
+    Only ``rows_per_batch`` rows are held in memory at a time, so a whole
+    library can be exported from :meth:`gyazo.Api.iter_image_lists` without
+    loading it. Requires ``pyarrow``.
+
+    :param pages: Pages of images, e.g. from
+                  :meth:`gyazo.Api.iter_image_lists` or a single
+                  :class:`ImageList` in a list
+    :param path: A path or a writable binary file
+    :param rows_per_batch: (optional) Number of rows written at once
+                           (default: 10000)
+    :param kwargs: Keyword arguments passed to
+                   ``pyarrow.parquet.ParquetWriter``
+    :return: The number of rows written
+    """
+    import pyarrow.parquet
+
+    rows = 0
+    writer = None
+    try:
+        for table in _iter_tables(pages, rows_per_batch):
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, table.schema,
+                                                       **kwargs)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is None:
+            table = ImageColumns().to_arrow()
+            writer = pyarrow.parquet.ParquetWriter(path, table.schema,
+                                                   **kwargs)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def write_arrow_ipc(pages: Iterable[Iterable[Image]],
+                    sink: Union[str, Any],
+                    rows_per_batch: int = 10000) -> int:
+    """Write images to an Arrow IPC stream page by page
+
+    :param pages: Pages of images, e.g. from
+                  :meth:`gyazo.Api.iter_image_lists`
+    :param sink: A path or a writable binary file
+    :param rows_per_batch: (optional) Number of rows written at once
+                           (default: 10000)
+    :return: The number of rows written
+    """
+    import pyarrow
+
+    schema = ImageColumns().to_arrow().schema
+    rows = 0
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for table in _iter_tables(pages, rows_per_batch):
+            writer.write_table(table)
+            rows += table.num_rows
+    return rows
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from types import TracebackType
+from typing import BinaryIO, Optional, Type, cast
+
+from .image import Image
+from .multipart import FileSource
+
+
+def hash_file(source: FileSource,
+              chunk_size: int = 64 * 1024) -> Optional[str]:
+    """Return the SHA-256 hex digest of a file, read as a stream
+
+    The position of a file object is restored afterwards. ``None`` is
+    returned for sources that cannot be read twice, such as iterators.
+
+    :param source: A path or a seekable binary file
+    :param chunk_size: (optional) Size of chunks read in bytes
+                       (default: 65536)
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, 'rb') as opened:
+            for chunk in iter(lambda: opened.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    if not hasattr(source, 'read'):
+        return None
+    f = cast(BinaryIO, source)
+    try:
+        position = f.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+    try:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    finally:
+        f.seek(position)
+    return digest.hexdigest()
+
+
+class UploadIndex:
+    """A persistent index of uploaded files keyed by content hash
+
+    When passed to :class:`gyazo.Api` as ``upload_index``, uploading a file
+    whose content was uploaded before returns the previous :class:`Image`
+    instead of uploading it again. The index is a SQLite database in WAL
+    mode, so several processes may share one file.
+    """
+
+    def __init__(self, path: str = ':memory:', timeout: float = 30.0) -> None:
+        """
+        :param path: (optional) Path to the SQLite database file
+                     (default: an in-memory database)
+        :param timeout: (optional) Seconds to wait for a lock held by
+                        another writer (default: 30)
+        """
+        #: Path to the SQLite database file
+        self.path = path  # type: str
+        #: The number of lookups that found a previous upload
+        self.hits = 0  # type: int
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS uploads ('
+                ' sha256 TEXT PRIMARY KEY,'
+                ' image_id TEXT,'
+                ' data TEXT NOT NULL)')
+
+    def __enter__(self) -> 'UploadIndex':
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection.execute('SELECT COUNT(*) FROM uploads')
+            return int(row.fetchone()[0])
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._connection.close()
+
+    def get(self, sha256: str) -> Optional[Image]:
+        """Return the image uploaded with this content hash
+
+        :param sha256: SHA-256 hex digest of the file
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM uploads WHERE sha256 = ?',
+                (sha256,)).fetchone()
+            if row is None:
+                return None
+            self.hits += 1
+        return Image.from_dict(json.loads(row[0]))
+
+    def add(self, sha256: str, image: Image) -> None:
+        """Remember an uploaded image
+
+        The first image recorded for a hash wins, so concurrent uploaders
+        agree on one image.
+
+        :param sha256: SHA-256 hex digest of the file
+        :param image: The uploaded image
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR IGNORE INTO uploads (sha256, image_id, data)'
+                ' VALUES (?, ?, ?)',
+                (sha256, image.image_id, image.to_json()))
+
+    def remove_image(self, image_id: str) -> None:
+        """Forget an image, e.g. after it was deleted
+
+        :param image_id: Image ID
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM uploads WHERE image_id = ?', (image_id,))
@@ -1,3 +1,21 @@
+from typing import Optional
+
+
 class GyazoError(Exception):
     """Base class for Gyazo errors"""
-    pass
+
+    def __init__(self,
+                 message: str,
+                 status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None) -> None:
+        """
+        :param message: Error message
+        :param status_code: (optional) HTTP status code of the response
+        :param retry_after: (optional) Seconds to wait before retrying, as
+                            requested by the server
+        """
+        super().__init__(message)
+        #: HTTP status code of the response, if any
+        self.status_code = status_code  # type: Optional[int]
+        #: Seconds to wait before retrying, if requested by the server
+        self.retry_after = retry_after  # type: Optional[float]
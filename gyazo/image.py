@@ -1,19 +1,108 @@
-from datetime import datetime
-import json
+from datetime import datetime, timedelta, timezone
 import math
-from typing import (Any, Dict, Iterable, Iterator, List, Mapping,
-                    Optional, Union)
-
-import dateutil.parser
-import dateutil.tz
-import requests
+import os
+import re
+from typing import (TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterable,
+                    Iterator, List, Mapping, Optional, Union, cast)
 
 from .error import GyazoError
 
+# requests, dateutil and json are imported on first use to keep
+# ``import gyazo`` fast for scripts that only handle models
+if TYPE_CHECKING:
+    import requests
+
+    from .blobcache import BlobCache
+    from .columnar import ImageColumns
+
+
+#: A destination of streaming downloads: a path, a writable binary file or a
+#: callable receiving each chunk
+Sink = Union[str, BinaryIO, Callable[[bytes], Any]]
+
+#: Default chunk size of streaming downloads in bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+_DATETIME_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?'
+    r'(Z|[+-]\d{2}:?\d{2})$')
+_TIMEZONES = {'Z': timezone.utc}  # type: Dict[str, timezone]
+
+
+def parse_datetime(value: str) -> datetime:
+    """Parse a timestamp sent by Gyazo API
+
+    Timestamps in the format used by the API (e.g.
+    ``2014-07-25T08:29:51+0000`` or ``2020-02-01T13:31:37.197+0000``) are
+    parsed directly; anything else falls back to :mod:`dateutil.parser`.
+
+    :param value: A timestamp string
+    """
+    match = _DATETIME_RE.match(value)
+    if match is None:
+        return _parse_datetime_slow(value)
+    (year, month, day, hour, minute, second, fraction,
+     offset) = match.groups()
+    try:
+        tz = _TIMEZONES.get(offset)
+        if tz is None:
+            minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+            if minutes == 0:
+                tz = timezone.utc
+            else:
+                sign = -1 if offset[0] == '-' else 1
+                tz = timezone(timedelta(minutes=sign * minutes))
+            _TIMEZONES[offset] = tz
+        return datetime(int(year), int(month), int(day),
+                        int(hour), int(minute), int(second),
+                        int(fraction.ljust(6, '0')) if fraction else 0,
+                        tzinfo=tz)
+    except ValueError:
+        return _parse_datetime_slow(value)
+
+
+def _parse_datetime_slow(value: str) -> datetime:
+    import dateutil.parser
+
+    return dateutil.parser.parse(value)
+
+
+def format_datetime(value: datetime) -> str:
+    """Format a timestamp in the format used by Gyazo API
+
+    Equivalent to ``value.strftime('%Y-%m-%dT%H:%M:%S%z')``, but faster.
+
+    :param value: A datetime
+    """
+    offset = value.utcoffset()
+    if offset is None:
+        zone = ''
+    else:
+        seconds = offset.days * 86400 + offset.seconds
+        if offset.microseconds or seconds % 60:
+            return value.strftime('%Y-%m-%dT%H:%M:%S%z')
+        sign = '-' if seconds < 0 else '+'
+        minutes = abs(seconds) // 60
+        zone = '%s%02d%02d' % (sign, minutes // 60, minutes % 60)
+    return '%04d-%02d-%02dT%02d:%02d:%02d%s' % (
+        value.year, value.month, value.day,
+        value.hour, value.minute, value.second, zone)
+
 
 class Image:
     """A class representing an image of Gyazo"""
 
+    __slots__ = (
+        'created_at',
+        'image_id',
+        'permalink_url',
+        'thumb_url',
+        'type',
+        'url',
+        'ocr',
+    )
+
     def __init__(self, **kwargs: Any) -> None:
         #: The time this image was created
         self.created_at = kwargs['created_at']  # type: datetime
@@ -45,7 +134,7 @@ class Image:
             elif isinstance(v, dict) and v == {}:
                 continue
             elif k == 'created_at' and v:
-                kwargs[k] = dateutil.parser.parse(v)
+                kwargs[k] = parse_datetime(v)
             else:
                 kwargs[k] = v
 
@@ -58,7 +147,8 @@ class Image:
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Image):
             return NotImplemented
-        return self.__dict__ == other.__dict__
+        return all(getattr(self, attr) == getattr(other, attr)
+                   for attr in Image.__slots__)
 
     def __or__(self, other: 'Image') -> 'Image':
         if not isinstance(other, Image):
@@ -112,6 +202,8 @@ class Image:
 
         :getter: Return the time this image was created in local time zone
         """
+        import dateutil.tz
+
         return self.created_at.astimezone(dateutil.tz.tzlocal())
 
     def to_json(self,
@@ -123,6 +215,8 @@ class Image:
                        level
         :param sort_keys: the output is sorted by key
         """
+        import json
+
         return json.dumps(self.to_dict(), indent=indent, sort_keys=sort_keys)
 
     def to_dict(self) -> Dict[str, Any]:
@@ -130,8 +224,7 @@ class Image:
         data = {}  # type: Dict[str, Any]
 
         if self.created_at:
-            data['created_at'] = self.created_at.strftime(
-                '%Y-%m-%dT%H:%M:%S%z')
+            data['created_at'] = format_datetime(self.created_at)
         if self.image_id:
             data['image_id'] = self.image_id
         if self.permalink_url:
@@ -147,34 +240,164 @@ class Image:
 
         return data
 
-    def download(self) -> Optional[bytes]:
+    def download(self,
+                 session: Optional['requests.Session'] = None,
+                 cache: Optional['BlobCache'] = None) -> Optional[bytes]:
         """Download an image file if it exists
 
+        :param session: (optional) HTTP session used to send the request,
+                        e.g. one returned by :meth:`gyazo.Api.get_session`
+        :param cache: (optional) A local file cache; a cached file is
+                      returned without any request
         :raise GyazoError:
         """
-        if self.url is None or self.url == '':
+        if self.url is None or self.url == '' or self.filename is None:
             return None
-        try:
-            return requests.get(self.url).content
-        except requests.RequestException as e:
-            raise GyazoError(str(e))
+        return _download_bytes(self.url, session, cache, self.filename)
 
-    def download_thumb(self) -> Optional[bytes]:
+    def download_thumb(self,
+                       session: Optional['requests.Session'] = None,
+                       cache: Optional['BlobCache'] = None
+                       ) -> Optional[bytes]:
         """Download a thumbnail image file
 
+        :param session: (optional) HTTP session used to send the request,
+                        e.g. one returned by :meth:`gyazo.Api.get_session`
+        :param cache: (optional) A local file cache; a cached file is
+                      returned without any request
+        :raise GyazoError:
+        """
+        if (self.thumb_url is None or self.thumb_url == ''
+                or self.thumb_filename is None):
+            return None
+        return _download_bytes(self.thumb_url, session, cache,
+                               self.thumb_filename)
+
+    def download_to(self,
+                    sink: Sink,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    session: Optional['requests.Session'] = None
+                    ) -> Optional[int]:
+        """Stream an image file into a sink if it exists
+
+        The response body is written chunk by chunk, so memory use does not
+        depend on the image size.
+
+        :param sink: A path, a writable binary file or a callable receiving
+                     each chunk; a path is only replaced once the whole
+                     file is downloaded
+        :param chunk_size: (optional) Size of each chunk in bytes
+                           (default: 65536)
+        :param session: (optional) HTTP session used to send the request
+        :return: The number of bytes written
+        :raise GyazoError:
+        """
+        if self.url is None or self.url == '':
+            return None
+        return _download_stream(self.url, sink, chunk_size, session)
+
+    def download_thumb_to(self,
+                          sink: Sink,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          session: Optional['requests.Session'] = None
+                          ) -> Optional[int]:
+        """Stream a thumbnail image file into a sink
+
+        :param sink: A path, a writable binary file or a callable receiving
+                     each chunk; a path is only replaced once the whole
+                     file is downloaded
+        :param chunk_size: (optional) Size of each chunk in bytes
+                           (default: 65536)
+        :param session: (optional) HTTP session used to send the request
+        :return: The number of bytes written
         :raise GyazoError:
         """
         if self.thumb_url is None or self.thumb_url == '':
             return None
+        return _download_stream(self.thumb_url, sink, chunk_size, session)
+
+
+def _download_bytes(url: str,
+                    session: Optional['requests.Session'] = None,
+                    cache: Optional['BlobCache'] = None,
+                    key: Optional[str] = None) -> bytes:
+    if cache is not None and key is not None:
+        data = cache.get(key)
+        if data is not None:
+            return data
+    import requests
+
+    response = None
+    try:
+        get = requests.get if session is None else session.get
+        response = get(url)
+        if cache is None:
+            return response.content
+        # Never cache error pages
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise GyazoError(str(e), status_code=(
+            response.status_code if response is not None else None))
+    if key is not None:
+        cache.put(key, response.content)
+    return response.content
+
+
+def _download_stream(url: str,
+                     sink: Sink,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     session: Optional['requests.Session'] = None) -> int:
+    if isinstance(sink, str):
+        return _download_to_path(url, sink, chunk_size, session)
+    import requests
+
+    write = sink.write if hasattr(sink, 'write') else sink  # type: Any
+    written = 0
+    try:
+        get = requests.get if session is None else session.get
+        response = get(url, stream=True)
         try:
-            return requests.get(self.thumb_url).content
-        except requests.RequestException as e:
-            raise GyazoError(str(e))
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                write(chunk)
+                written += len(chunk)
+        finally:
+            response.close()
+    except requests.RequestException as e:
+        raise GyazoError(str(e))
+    return written
+
+
+def _download_to_path(url: str,
+                      path: str,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      session: Optional['requests.Session'] = None) -> int:
+    # Write next to the target and rename once complete, so that a failed
+    # download never leaves an empty or truncated file behind
+    part = path + '.part'
+    try:
+        with open(part, 'wb') as f:
+            written = _download_stream(url, f, chunk_size, session)
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return written
 
 
 class ImageList:
     """A class representing a list of gyazo.Image"""
 
+    __slots__ = (
+        'total_count',
+        'current_page',
+        'per_page',
+        'user_type',
+        '_images',
+        '_records',
+    )
+
     def __init__(self, **kwargs: Any) -> None:
         #: The number of images
         self.total_count = kwargs.get('total_count')  # type: Optional[int]
@@ -184,23 +407,86 @@ class ImageList:
         self.per_page = kwargs.get('per_page')  # type: Optional[int]
         #: User type
         self.user_type = kwargs.get('user_type')  # type: Optional[str]
-        #: List of images
-        self.images = kwargs.get('images', [])  # type: List[Image]
+        # Images, or None for images of a lazy list not built yet
+        self._images = kwargs.get('images', [])  # type: List[Any]
+        # Raw JSON records of a lazy list; None once an item is replaced
+        self._records = None  # type: Optional[List[Any]]
 
     def __len__(self) -> int:
-        return len(self.images)
+        return len(self._images)
 
     def __getitem__(self, key: int) -> Image:
-        return self.images[key]
+        if isinstance(key, slice):
+            indices = range(*key.indices(len(self)))
+            return cast(Image, [self[i] for i in indices])
+        image = self._images[key]
+        if image is None:
+            image = Image.from_dict(cast(List[Any], self._records)[key])
+            self._images[key] = image
+        return cast(Image, image)
 
     def __setitem__(self, key: int, value: Image) -> None:
-        self.images[key] = value
+        if isinstance(key, slice):
+            # Splice records alongside, as a slice may change the length
+            images = list(cast(Iterable[Image], value))
+            self._images[key] = images
+            if self._records is not None:
+                self._records[key] = [None] * len(images)
+            return
+        self._images[key] = value
+        if self._records is not None:
+            self._records[key] = None
 
     def __delitem__(self, key: int) -> None:
-        del self.images[key]
+        del self._images[key]
+        if self._records is not None:
+            del self._records[key]
 
     def __iter__(self) -> Iterator[Image]:
-        return self.images.__iter__()
+        if self._records is None:
+            return iter(self._images)
+        return (self[i] for i in range(len(self._images)))
+
+    def __copy__(self) -> 'ImageList':
+        copied = ImageList(images=list(self._images),
+                           total_count=self.total_count,
+                           current_page=self.current_page,
+                           per_page=self.per_page,
+                           user_type=self.user_type)
+        if self._records is not None:
+            copied._records = list(self._records)
+        return copied
+
+    @property
+    def images(self) -> List[Image]:
+        """List of images
+
+        :getter: Return the list of images. Every image of a lazy list is
+                 built first and, as the returned list may be modified
+                 freely, its raw records are discarded.
+        :setter: Replace the list of images
+        """
+        self._materialize()
+        return self._images
+
+    @images.setter
+    def images(self, images: List[Image]) -> None:
+        self._images = images
+        self._records = None
+
+    def _materialize(self) -> None:
+        if self._records is not None:
+            for i in range(len(self._images)):
+                self[i]
+            self._records = None
+
+    @property
+    def is_lazy(self) -> bool:
+        """Whether raw JSON records are kept and images built on demand
+
+        :getter: Return true if this list is lazy
+        """
+        return self._records is not None
 
     def __add__(self, other: 'ImageList') -> 'ImageList':
         if isinstance(other, ImageList):
@@ -271,14 +557,43 @@ class ImageList:
         :param indent: specify an indent level or a string used to indent each
                        level
         :param sort_keys: the output of dictionaries is sorted by key
+
+        Raw records of a lazy list are written as received from the API,
+        without building :class:`Image` instances.
+        """
+        import json
+
+        return json.dumps(self._to_list(), indent=indent, sort_keys=sort_keys)
+
+    def to_columns(self) -> 'ImageColumns':
+        """Return the metadata of the images as :class:`ImageColumns`
+
+        Raw records of a lazy list are read without building :class:`Image`
+        instances.
         """
-        return json.dumps([i.to_dict() for i in self.images],
-                          indent=indent, sort_keys=sort_keys)
+        from .columnar import ImageColumns
+        return ImageColumns.from_images(self)
+
+    def _to_list(self) -> List[Mapping[str, Any]]:
+        if self._records is None:
+            return [i.to_dict() for i in self.images]
+        return [
+            r if r is not None else self[n].to_dict()
+            for n, r in enumerate(self._records)
+        ]
 
     @staticmethod
-    def from_list(data: Iterable[Mapping[str, Any]]) -> 'ImageList':
+    def from_list(data: Iterable[Mapping[str, Any]],
+                  lazy: bool = False) -> 'ImageList':
         """Create a new instance from list
 
         :param data: A JSON list
+        :param lazy: (optional) Keep the JSON records and build each
+                     :class:`Image` on first access (default: false)
         """
-        return ImageList(images=[Image.from_dict(d) for d in data])
+        if not lazy:
+            return ImageList(images=[Image.from_dict(d) for d in data])
+        records = list(data)  # type: List[Any]
+        images = ImageList(images=[None] * len(records))
+        images._records = records
+        return images
@@ -0,0 +1,278 @@
+from bisect import bisect_left
+from collections import OrderedDict
+import threading
+from typing import (TYPE_CHECKING, Any, Dict, List, Mapping, Optional,
+                    Sequence, Tuple)
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from requests.models import Response
+
+
+#: Upper bounds of latency histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+Labels = List[Tuple[str, str]]
+
+
+def endpoint_name(url: str) -> str:
+    """Return a low-cardinality name of the endpoint of ``url``
+
+    Image IDs and file names are replaced with placeholders, so every image
+    is counted under the same endpoint.
+
+    :param url: Requested URL
+    """
+    path = urlsplit(url).path
+    if path.startswith('/api/images/'):
+        return '/api/images/:image_id'
+    if path.startswith('/api/'):
+        return path
+    return '/:file'
+
+
+class RequestInfo:
+    """A description of an HTTP request sent by :class:`gyazo.Api`"""
+
+    __slots__ = ('method', 'url', 'endpoint', 'attempt', 'request_bytes')
+
+    def __init__(self, method: str, url: str, attempt: int = 0,
+                 request_bytes: Optional[int] = None) -> None:
+        #: HTTP method in upper case
+        self.method = method.upper()  # type: str
+        #: Requested URL without query parameters
+        self.url = url  # type: str
+        #: Endpoint name as returned by :func:`endpoint_name`
+        self.endpoint = endpoint_name(url)  # type: str
+        #: The number of the retry (0 for the first attempt)
+        self.attempt = attempt  # type: int
+        #: Size of the request body in bytes, if known
+        self.request_bytes = request_bytes  # type: Optional[int]
+
+
+class Hook:
+    """Base class for request hooks of :class:`gyazo.Api`
+
+    Hooks are called for every attempt, including retries, from the thread
+    sending the request, so they must be thread-safe and fast. Subclasses
+    override the methods they need; an exception raised by a hook is
+    propagated to the caller. Files streamed by
+    :meth:`gyazo.Api.download_images` are not reported.
+    """
+
+    def before_request(self, info: RequestInfo) -> None:
+        """Called before a request is sent
+
+        :param info: The request
+        """
+
+    def after_response(self, info: RequestInfo, response: 'Response',
+                       elapsed: float) -> None:
+        """Called when a response was received, whatever its status
+
+        :param info: The request
+        :param response: The response; its body may not be read yet
+        :param elapsed: Time until the response headers arrived in seconds
+        """
+
+    def on_error(self, info: RequestInfo, error: Exception,
+                 elapsed: float) -> None:
+        """Called when no response was received, e.g. on a timeout
+
+        :param info: The request
+        :param error: The exception raised by ``requests``
+        :param elapsed: Time until the error in seconds
+        """
+
+
+class EndpointStats:
+    """Counters of one endpoint collected by :class:`Metrics`"""
+
+    __slots__ = ('requests', 'errors', 'retries', 'statuses', 'buckets',
+                 'latency_sum', 'request_bytes', 'response_bytes')
+
+    def __init__(self, bucket_count: int) -> None:
+        #: The number of requests sent, including retries
+        self.requests = 0  # type: int
+        #: The number of requests failing without a response or with a status
+        #: code of 400 or above
+        self.errors = 0  # type: int
+        #: The number of retried requests
+        self.retries = 0  # type: int
+        #: The number of responses by status code
+        self.statuses = {}  # type: Dict[int, int]
+        #: The number of requests in each latency bucket, the last one
+        #: counting requests slower than every bound
+        self.buckets = [0] * (bucket_count + 1)  # type: List[int]
+        #: Total latency in seconds
+        self.latency_sum = 0.0  # type: float
+        #: Total size of request bodies of known size in bytes
+        self.request_bytes = 0  # type: int
+        #: Total size of response bodies with ``Content-Length`` in bytes
+        self.response_bytes = 0  # type: int
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        """The ratio of requests that failed
+
+        :getter: Return the error rate, or ``None`` if nothing was sent
+        """
+        if self.requests == 0:
+            return None
+        return self.errors / self.requests
+
+
+class Metrics(Hook):
+    """A hook collecting per-endpoint request metrics
+
+    Only counters are updated per request, so the collector is cheap enough
+    to be left enabled. :meth:`to_prometheus` renders the metrics in the
+    Prometheus text format; :meth:`snapshot` returns plain data to be fed to
+    other systems such as OpenTelemetry.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """
+        :param buckets: (optional) Upper bounds of latency histogram buckets
+                        in seconds (default: :data:`DEFAULT_BUCKETS`)
+        """
+        #: Upper bounds of latency histogram buckets in seconds
+        self.buckets = tuple(sorted(buckets))  # type: Tuple[float, ...]
+        self._endpoints = {}  # type: Dict[Tuple[str, str], EndpointStats]
+        self._lock = threading.Lock()
+
+    def _record(self, info: RequestInfo, elapsed: float,
+                status_code: Optional[int],
+                response_bytes: Optional[int]) -> None:
+        key = (info.method, info.endpoint)
+        bucket = bisect_left(self.buckets, elapsed)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = EndpointStats(len(self.buckets))
+                self._endpoints[key] = stats
+            stats.requests += 1
+            if info.attempt > 0:
+                stats.retries += 1
+            if status_code is None or status_code >= 400:
+                stats.errors += 1
+            if status_code is not None:
+                stats.statuses[status_code] = (
+                    stats.statuses.get(status_code, 0) + 1)
+            stats.buckets[bucket] += 1
+            stats.latency_sum += elapsed
+            if info.request_bytes is not None:
+                stats.request_bytes += info.request_bytes
+            if response_bytes is not None:
+                stats.response_bytes += response_bytes
+
+    def after_response(self, info: RequestInfo, response: 'Response',
+                       elapsed: float) -> None:
+        try:
+            length = int(response.headers.get('Content-Length', ''))
+        except ValueError:
+            length = None
+        self._record(info, elapsed, response.status_code, length)
+
+    def on_error(self, info: RequestInfo, error: Exception,
+                 elapsed: float) -> None:
+        self._record(info, elapsed, None, None)
+
+    def get(self, method: str, endpoint: str) -> Optional[EndpointStats]:
+        """Return the counters of an endpoint
+
+        :param method: HTTP method
+        :param endpoint: Endpoint name, e.g. ``/api/images``
+        """
+        with self._lock:
+            return self._endpoints.get((method.upper(), endpoint))
+
+    def reset(self) -> None:
+        """Remove all collected metrics"""
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the collected metrics as JSON-compatible data
+
+        Each item describes one endpoint; ``buckets`` holds cumulative
+        counts keyed by upper bound, as in Prometheus and OpenTelemetry
+        histograms.
+        """
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            result = []
+            for (method, endpoint), stats in items:
+                cumulative = 0
+                # Ordered by bound, also on Python 3.5
+                buckets = OrderedDict()  # type: Dict[str, int]
+                for bound, count in zip(self.buckets, stats.buckets):
+                    cumulative += count
+                    buckets[repr(bound)] = cumulative
+                buckets['+Inf'] = stats.requests
+                result.append({
+                    'method': method,
+                    'endpoint': endpoint,
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'retries': stats.retries,
+                    'statuses': dict(stats.statuses),
+                    'latency_sum': stats.latency_sum,
+                    'buckets': buckets,
+                    'request_bytes': stats.request_bytes,
+                    'response_bytes': stats.response_bytes,
+                })
+        return result
+
+    def to_prometheus(self, prefix: str = 'gyazo') -> str:
+        """Return the collected metrics in the Prometheus text format
+
+        :param prefix: (optional) Prefix of metric names (default: gyazo)
+        """
+        lines = []  # type: List[str]
+        snapshot = self.snapshot()
+
+        def add(name: str, kind: str, help_text: str,
+                samples: List[Tuple[str, Labels, Any]]) -> None:
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help_text))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+            for suffix, labels, value in samples:
+                label_text = ','.join(
+                    '{}="{}"'.format(k, v) for k, v in labels)
+                lines.append('{}_{}{}{{{}}} {}'.format(
+                    prefix, name, suffix, label_text, value))
+
+        # Label pairs are kept in a list so that their order is the same on
+        # every Python version
+        def labels(item: Mapping[str, Any], *extra: Tuple[str, str]) -> Labels:
+            return [('method', item['method']),
+                    ('endpoint', item['endpoint'])] + list(extra)
+
+        add('requests_total', 'counter', 'HTTP requests sent',
+            [('', labels(i), i['requests']) for i in snapshot])
+        add('responses_total', 'counter', 'HTTP responses received',
+            [('', labels(i, ('status', str(status))), count)
+             for i in snapshot
+             for status, count in sorted(i['statuses'].items())])
+        add('request_errors_total', 'counter',
+            'HTTP requests failing without a response or with an error status',
+            [('', labels(i), i['errors']) for i in snapshot])
+        add('request_retries_total', 'counter', 'HTTP requests retried',
+            [('', labels(i), i['retries']) for i in snapshot])
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        samples = []  # type: List[Tuple[str, Labels, Any]]
+        for i in snapshot:
+            for bound in bounds:
+                samples.append(('_bucket', labels(i, ('le', bound)),
+                                i['buckets'][bound]))
+            samples.append(('_sum', labels(i), i['latency_sum']))
+            samples.append(('_count', labels(i), i['requests']))
+        add('request_duration_seconds', 'histogram',
+            'Time until response headers arrived', samples)
+        add('request_bytes_total', 'counter', 'Bytes of request bodies sent',
+            [('', labels(i), i['request_bytes']) for i in snapshot])
+        add('response_bytes_total', 'counter',
+            'Bytes of response bodies announced by Content-Length',
+            [('', labels(i), i['response_bytes']) for i in snapshot])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,144 @@
+import binascii
+import os
+from typing import (Any, BinaryIO, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Union, cast)
+
+
+#: A source of an uploaded file: a path, a readable binary file or an
+#: iterable of byte chunks
+FileSource = Union[str, BinaryIO, Iterable[bytes]]
+
+#: A callable receiving the number of bytes sent so far and the total body
+#: size (``None`` if unknown)
+ProgressCallback = Callable[[int, Optional[int]], Any]
+
+
+class MultipartEncoder:
+    """A streaming ``multipart/form-data`` encoder
+
+    The body is produced lazily, chunk by chunk, so a file is never held in
+    memory as a whole. The instance can be passed as ``data`` to requests;
+    if the size of the file is known it is sent with a ``Content-Length``
+    header, otherwise with chunked transfer encoding.
+    """
+
+    def __init__(self,
+                 fields: Dict[str, str],
+                 file_field: str,
+                 source: FileSource,
+                 filename: Optional[str] = None,
+                 chunk_size: int = 64 * 1024,
+                 progress: Optional[ProgressCallback] = None) -> None:
+        """
+        :param fields: Form fields sent before the file
+        :param file_field: Name of the file field
+        :param source: A path, a readable binary file or an iterable of byte
+                       chunks
+        :param filename: (optional) File name sent in the file part
+                         (default: the base name of the source)
+        :param chunk_size: (optional) Size of chunks read from the source
+                           in bytes (default: 65536)
+        :param progress: (optional) A callable receiving the number of bytes
+                         sent so far and the total body size
+        """
+        self.boundary = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.chunk_size = chunk_size  # type: int
+        self.progress = progress  # type: Optional[ProgressCallback]
+        self._source = source
+        if filename is None:
+            filename = _guess_filename(source, file_field)
+
+        parts = []  # type: List[bytes]
+        for name, value in fields.items():
+            parts.append(self._part_header(name) + value.encode('utf-8')
+                         + b'\r\n')
+        parts.append(self._part_header(file_field, filename))
+        self._head = b''.join(parts)
+        self._tail = ('\r\n--' + self.boundary + '--\r\n').encode('ascii')
+
+        file_size = _source_size(source)
+        if file_size is None:
+            self.length = None  # type: Optional[int]
+        else:
+            self.length = len(self._head) + file_size + len(self._tail)
+
+    @property
+    def content_type(self) -> str:
+        """A ``Content-Type`` header value for the body
+
+        :getter: Return a ``multipart/form-data`` content type
+        """
+        return 'multipart/form-data; boundary=' + self.boundary
+
+    def __len__(self) -> int:
+        # requests only sends Content-Length if the length is truthy
+        return self.length or 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        sent = 0
+        for chunk in self._iter_chunks():
+            if not chunk:
+                continue
+            sent += len(chunk)
+            yield chunk
+            if self.progress is not None:
+                self.progress(sent, self.length)
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        yield self._head
+        source = self._source
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                for chunk in _read_chunks(f, self.chunk_size):
+                    yield chunk
+        elif hasattr(source, 'read'):
+            for chunk in _read_chunks(cast(BinaryIO, source),
+                                      self.chunk_size):
+                yield chunk
+        else:
+            for chunk in source:
+                yield chunk
+        yield self._tail
+
+    def _part_header(self, name: str, filename: Optional[str] = None) -> bytes:
+        disposition = 'form-data; name="' + _quote(name) + '"'
+        if filename is not None:
+            disposition += '; filename="' + _quote(filename) + '"'
+        return ('--' + self.boundary + '\r\n'
+                + 'Content-Disposition: ' + disposition + '\r\n\r\n'
+                ).encode('utf-8')
+
+
+def _read_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _quote(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace('"', '%22')
+            .replace('\r', '%0D').replace('\n', '%0A'))
+
+
+def _guess_filename(source: FileSource, default: str) -> str:
+    name = source if isinstance(source, str) else getattr(source, 'name', None)
+    if isinstance(name, str) and name and name[0] != '<' and name[-1] != '>':
+        return os.path.basename(name)
+    return default
+
+
+def _source_size(source: FileSource) -> Optional[int]:
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    if not hasattr(source, 'read'):
+        return None
+    f = cast(BinaryIO, source)
+    try:
+        position = f.tell()
+        end = f.seek(0, os.SEEK_END)
+        f.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
@@ -0,0 +1,252 @@
+import json
+import sqlite3
+import threading
+from types import TracebackType
+from typing import (Any, Iterable, List, Mapping, Optional, Tuple, Type,
+                    Union)
+
+from .image import Image, ImageList
+
+
+def _fts5_available(connection: sqlite3.Connection) -> bool:
+    try:
+        connection.execute(
+            'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+    except sqlite3.OperationalError:
+        return False
+    connection.execute('DROP TABLE temp.fts5_probe')
+    return True
+
+
+def _quote(text: str) -> str:
+    return ' '.join('"' + term.replace('"', '""') + '"'
+                    for term in text.split())
+
+
+class OcrIndex:
+    """A local full-text index of OCR results backed by SQLite FTS5
+
+    When passed to :class:`gyazo.Api` as ``ocr_index``, every page fetched by
+    :meth:`gyazo.Api.get_image_list` (and so by :meth:`gyazo.Api.iter_images`
+    and :meth:`gyazo.SyncIndex.sync`) is added to the index, and deleted
+    images are removed. Raw records of lazy pages are indexed without
+    building :class:`Image` instances.
+
+    The default ``unicode61`` tokenizer splits words on spaces and
+    punctuation. For languages written without spaces, such as Japanese,
+    use the ``trigram`` tokenizer (SQLite 3.34+), which matches any
+    substring of three or more characters. Without FTS5 in the SQLite
+    library, searches fall back to a slower substring scan.
+    """
+
+    def __init__(self, path: str = ':memory:',
+                 tokenizer: str = 'unicode61',
+                 timeout: float = 30.0) -> None:
+        """
+        :param path: (optional) Path to the SQLite database file
+                     (default: an in-memory database)
+        :param tokenizer: (optional) FTS5 tokenizer used when the index is
+                          created (default: unicode61)
+        :param timeout: (optional) Seconds to wait for a lock held by
+                        another writer (default: 30)
+        """
+        #: Path to the SQLite database file
+        self.path = path  # type: str
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=timeout,
+                                           check_same_thread=False)
+        #: Whether searches use FTS5
+        self.full_text = _fts5_available(self._connection)  # type: bool
+        with self._lock, self._connection:
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS images ('
+                ' id INTEGER PRIMARY KEY,'
+                ' image_id TEXT NOT NULL UNIQUE,'
+                ' locale TEXT,'
+                ' description TEXT NOT NULL,'
+                ' data TEXT NOT NULL)')
+            if self.full_text:
+                self._connection.execute(
+                    'CREATE VIRTUAL TABLE IF NOT EXISTS ocr USING fts5('
+                    " description, content='images', content_rowid='id',"
+                    ' tokenize={})'.format(
+                        "'" + tokenizer.replace("'", "''") + "'"))
+
+    def __enter__(self) -> 'OcrIndex':
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection.execute('SELECT COUNT(*) FROM images')
+            return int(row.fetchone()[0])
+
+    def __contains__(self, image_id: object) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT 1 FROM images WHERE image_id = ?', (image_id,))
+            return row.fetchone() is not None
+
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._connection.close()
+
+    def add(self, images: Iterable[Image]) -> int:
+        """Add images with OCR results, replacing known ones
+
+        Images without OCR text are ignored.
+
+        :param images: Images, e.g. an :class:`ImageList`
+        :return: The number of images added or updated
+        """
+        entries = []  # type: List[Tuple[str, Optional[str], str, str]]
+        if isinstance(images, ImageList) and images._records is not None:
+            for n, record in enumerate(images._records):
+                if record is None:
+                    self._append_image(entries, images[n])
+                else:
+                    self._append_record(entries, record)
+        else:
+            for image in images:
+                self._append_image(entries, image)
+        if not entries:
+            return 0
+        changed = 0
+        with self._lock, self._connection:
+            for entry in entries:
+                changed += self._upsert(*entry)
+        return changed
+
+    @staticmethod
+    def _append_record(entries: List[Tuple[str, Optional[str], str, str]],
+                       record: Mapping[str, Any]) -> None:
+        ocr = record.get('ocr') or {}
+        description = ocr.get('description')
+        image_id = record.get('image_id')
+        if image_id and description:
+            entries.append((image_id, ocr.get('locale') or None, description,
+                            json.dumps(record, sort_keys=True)))
+
+    @staticmethod
+    def _append_image(entries: List[Tuple[str, Optional[str], str, str]],
+                      image: Image) -> None:
+        ocr = image.ocr or {}
+        description = ocr.get('description')
+        if image.image_id and description:
+            entries.append((image.image_id, ocr.get('locale') or None,
+                            description, image.to_json()))
+
+    def _upsert(self, image_id: str, locale: Optional[str],
+                description: str, data: str) -> int:
+        row = self._connection.execute(
+            'SELECT id, description FROM images WHERE image_id = ?',
+            (image_id,)).fetchone()
+        if row is not None and row[1] == description:
+            self._connection.execute(
+                'UPDATE images SET locale = ?, data = ? WHERE id = ?',
+                (locale, data, row[0]))
+            return 0
+        if row is not None:
+            self._delete_text(row[0], row[1])
+            self._connection.execute(
+                'UPDATE images SET locale = ?, description = ?, data = ?'
+                ' WHERE id = ?', (locale, description, data, row[0]))
+            rowid = row[0]
+        else:
+            rowid = self._connection.execute(
+                'INSERT INTO images (image_id, locale, description, data)'
+                ' VALUES (?, ?, ?, ?)',
+                (image_id, locale, description, data)).lastrowid
+        if self.full_text:
+            self._connection.execute(
+                'INSERT INTO ocr (rowid, description) VALUES (?, ?)',
+                (rowid, description))
+        return 1
+
+    def _delete_text(self, rowid: int, description: str) -> None:
+        if self.full_text:
+            self._connection.execute(
+                "INSERT INTO ocr (ocr, rowid, description)"
+                " VALUES ('delete', ?, ?)", (rowid, description))
+
+    def remove(self, image_ids: Iterable[str]) -> None:
+        """Remove images from the index
+
+        :param image_ids: Image IDs
+        """
+        with self._lock, self._connection:
+            for image_id in image_ids:
+                row = self._connection.execute(
+                    'SELECT id, description FROM images WHERE image_id = ?',
+                    (image_id,)).fetchone()
+                if row is None:
+                    continue
+                self._delete_text(row[0], row[1])
+                self._connection.execute('DELETE FROM images WHERE id = ?',
+                                         (row[0],))
+
+    def search(self, text: str, limit: Optional[int] = 20,
+               locale: Optional[str] = None,
+               syntax: bool = False) -> List[Image]:
+        """Return images whose OCR text contains every term of ``text``
+
+        Results are ordered by relevance.
+
+        :param text: Search terms separated by spaces
+        :param limit: (optional) Maximum number of results (default: 20,
+                      ``None`` for no limit)
+        :param locale: (optional) Only return OCR results in this locale
+        :param syntax: (optional) Pass ``text`` as an FTS5 query, e.g.
+                       ``error OR warning`` (default: false)
+        """
+        return [Image.from_dict(json.loads(row[0]))
+                for row in self._search('data', text, limit, locale, syntax)]
+
+    def search_ids(self, text: str, limit: Optional[int] = 20,
+                   locale: Optional[str] = None,
+                   syntax: bool = False) -> List[str]:
+        """Return IDs of images whose OCR text contains every term of
+        ``text``
+
+        Arguments are the same as :meth:`search`.
+        """
+        return [row[0] for row in
+                self._search('image_id', text, limit, locale, syntax)]
+
+    def _search(self, column: str, text: str, limit: Optional[int],
+                locale: Optional[str], syntax: bool) -> List[Tuple[str]]:
+        params = []  # type: List[Union[str, int]]
+        if self.full_text:
+            query = text if syntax else _quote(text)
+            if not query:
+                return []
+            sql = ('SELECT images.{} FROM ocr'
+                   ' JOIN images ON images.id = ocr.rowid'
+                   ' WHERE ocr MATCH ?').format(column)
+            params.append(query)
+        else:
+            terms = text.split()
+            if not terms:
+                return []
+            sql = 'SELECT {} FROM images WHERE '.format(column) + ' AND '.join(
+                "description LIKE ? ESCAPE '\\'" for _ in terms)
+            params.extend('%' + t.replace('\\', '\\\\').replace('%', '\\%')
+                          .replace('_', '\\_') + '%' for t in terms)
+        if locale is not None:
+            sql += ' AND images.locale = ?'
+            params.append(locale)
+        if self.full_text:
+            sql += ' ORDER BY ocr.rank'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+from typing import (Any, Callable, FrozenSet, Iterable, Iterator, Mapping,
+                    Optional)
+
+from .image import Image, ImageList, parse_datetime
+
+
+def _as_aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ImageQuery:
+    """Criteria selecting images from pages of the library
+
+    Cheap criteria (creation time, type and ``record_where``) are evaluated
+    on the raw JSON records of lazy pages, so an :class:`Image` is only
+    built for records that match. As the API returns images newest first,
+    :meth:`filter_pages` stops reading pages once an image created before
+    ``created_after`` is seen.
+    """
+
+    def __init__(self,
+                 created_after: Optional[datetime] = None,
+                 created_before: Optional[datetime] = None,
+                 types: Optional[Iterable[str]] = None,
+                 record_where: Optional[
+                     Callable[[Mapping[str, Any]], bool]] = None,
+                 where: Optional[Callable[[Image], bool]] = None) -> None:
+        """
+        :param created_after: (optional) Select images created after this
+                              time (naive times are taken as UTC)
+        :param created_before: (optional) Select images created before this
+                               time (naive times are taken as UTC)
+        :param types: (optional) Select images of these types,
+                      e.g. ``['gif']``
+        :param record_where: (optional) A predicate on the JSON record of an
+                             image sent by the API
+        :param where: (optional) A predicate on :class:`Image`, evaluated
+                      after the other criteria
+        """
+        #: Lower bound of creation times (exclusive)
+        self.created_after = _as_aware(
+            created_after)  # type: Optional[datetime]
+        #: Upper bound of creation times (exclusive)
+        self.created_before = _as_aware(
+            created_before)  # type: Optional[datetime]
+        #: Selected image types
+        self.types = (
+            frozenset(types) if types is not None else None
+        )  # type: Optional[FrozenSet[str]]
+        #: Predicate on JSON records
+        self.record_where = record_where
+        #: Predicate on images
+        self.where = where
+
+    def _in_range(self, created_at: Optional[datetime]) -> bool:
+        if self.created_after is None and self.created_before is None:
+            return True
+        if created_at is None:
+            return False
+        if self.created_after is not None and created_at <= self.created_after:
+            return False
+        if (self.created_before is not None
+                and created_at >= self.created_before):
+            return False
+        return True
+
+    def _is_past(self, created_at: Optional[datetime]) -> bool:
+        return (self.created_after is not None and created_at is not None
+                and created_at <= self.created_after)
+
+    def _match_record(self, record: Mapping[str, Any],
+                      created_at: Optional[datetime]) -> bool:
+        if self.types is not None and record.get('type') not in self.types:
+            return False
+        if not self._in_range(created_at):
+            return False
+        return self.record_where is None or self.record_where(record)
+
+    def match_record(self, record: Mapping[str, Any]) -> bool:
+        """Return whether a JSON record passes the cheap criteria
+
+        ``where`` is not evaluated, as it needs an :class:`Image`.
+
+        :param record: A JSON dict sent by the API
+        """
+        return self._match_record(record, self._record_created_at(record))
+
+    def match(self, image: Image) -> bool:
+        """Return whether an image passes every criterion
+
+        :param image: An image
+        """
+        if self.types is not None and image.type not in self.types:
+            return False
+        if not self._in_range(_as_aware(image.created_at)):
+            return False
+        if (self.record_where is not None
+                and not self.record_where(image.to_dict())):
+            return False
+        return self.where is None or self.where(image)
+
+    def _record_created_at(self,
+                           record: Mapping[str, Any]) -> Optional[datetime]:
+        if self.created_after is None and self.created_before is None:
+            return None
+        value = record.get('created_at')
+        # Timestamps without an offset are parsed as naive times
+        return _as_aware(parse_datetime(value)) if value else None
+
+    def filter_pages(self, pages: Iterable[ImageList]) -> Iterator[Image]:
+        """Yield the images of ``pages`` matching this query
+
+        Pages are expected newest first, as sent by the API.
+
+        :param pages: Pages of images, e.g. from
+                      :meth:`gyazo.Api.iter_image_lists` with ``lazy=True``
+        """
+        for page in pages:
+            records = page._records
+            for n in range(len(page)):
+                record = records[n] if records is not None else None
+                if record is None:
+                    image = page[n]
+                    if self._is_past(_as_aware(image.created_at)):
+                        return
+                    if self.match(image):
+                        yield image
+                    continue
+                created_at = self._record_created_at(record)
+                if self._is_past(created_at):
+                    return
+                if not self._match_record(record, created_at):
+                    continue
+                image = Image.from_dict(record)
+                if self.where is None or self.where(image):
+                    yield image
@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from typing import FrozenSet, Iterable, Mapping, Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header value into seconds
+
+    :param value: Delay in seconds or an HTTP date
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """A class describing how idempotent requests are retried
+
+    The delay before the n-th retry is ``backoff_factor * 2 ** (n - 1)``
+    seconds, capped at ``max_backoff``, with full jitter applied. When the
+    server sends ``Retry-After``, no backoff is added: the
+    :class:`RateLimiter` holds back every request for the full time
+    requested.
+    """
+
+    def __init__(self,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 max_backoff: float = 30.0,
+                 retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+                 jitter: bool = True) -> None:
+        """
+        :param max_retries: (optional) Maximum number of retries
+                            (default: 3)
+        :param backoff_factor: (optional) Base delay in seconds
+                               (default: 0.5)
+        :param max_backoff: (optional) Maximum delay in seconds
+                            (default: 30)
+        :param retry_statuses: (optional) HTTP status codes to be retried
+                               (default: 429, 500, 502, 503 and 504)
+        :param jitter: (optional) Randomize delays (default: true)
+        """
+        #: Maximum number of retries
+        self.max_retries = max_retries  # type: int
+        #: Base delay in seconds
+        self.backoff_factor = backoff_factor  # type: float
+        #: Maximum delay in seconds
+        self.max_backoff = max_backoff  # type: float
+        #: HTTP status codes to be retried
+        self.retry_statuses = frozenset(retry_statuses)  # type: FrozenSet[int]
+        #: Whether delays are randomized
+        self.jitter = jitter  # type: bool
+
+    def delay(self, attempt: int) -> float:
+        """Return the delay in seconds before a retry
+
+        :param attempt: The number of the retry (1-index)
+        """
+        delay = min(self.backoff_factor * 2.0 ** (attempt - 1),
+                    self.max_backoff)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RateLimiter:
+    """A token bucket shared by all threads using an :class:`gyazo.Api`
+
+    Besides the client-side budget, the limiter honours ``Retry-After`` and
+    ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` headers sent by the
+    server by pausing every request until the limit resets.
+    """
+
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 burst: int = 1) -> None:
+        """
+        :param rate: (optional) Requests per second (default: unlimited)
+        :param burst: (optional) Maximum number of requests sent at once
+                      (default: 1)
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        #: Requests per second
+        self.rate = rate  # type: Optional[float]
+        #: Maximum number of requests sent at once
+        self.burst = burst  # type: int
+        #: The number of times a request had to wait
+        self.throttled = 0  # type: int
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent
+
+        :return: Time waited in seconds
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(waited)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, waited: float = 0.0) -> float:
+        """Take a token without blocking if a request may be sent now
+
+        Callers which cannot block, e.g. coroutines, wait for the returned
+        time themselves and try again.
+
+        :param waited: (optional) Time already waited for this request in
+                       seconds, so that it is counted in :attr:`throttled`
+                       once sent (default: 0)
+        :return: 0 if a token was taken, otherwise seconds to wait before
+                 trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._paused_until - now
+            if wait <= 0 and self.rate is not None:
+                self._tokens = min(
+                    float(self.burst),
+                    self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            if wait > 0:
+                return wait
+            if waited > 0:
+                self.throttled += 1
+            return 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests for a while
+
+        :param seconds: Duration in seconds
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until,
+                                     time.monotonic() + seconds)
+
+    def update(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt to rate limit information sent by the server
+
+        :param status_code: HTTP status code
+        :param headers: HTTP headers
+        """
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None and status_code >= 400:
+            self.pause(retry_after)
+            return
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            if int(remaining) > 0:
+                return
+            reset_at = float(reset)
+        except ValueError:
+            return
+        # Reset is either an epoch time or a delay in seconds
+        if reset_at > 1e9:
+            reset_at -= time.time()
+        if reset_at > 0:
+            self.pause(reset_at)
@@ -0,0 +1,123 @@
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from .image import Image, ImageList
+
+
+class Serializer:
+    """A JSON encoder producing compact UTF-8 bytes"""
+
+    #: Name of the backend
+    name = 'json'
+
+    def __init__(self, sort_keys: bool = True) -> None:
+        """
+        :param sort_keys: (optional) Sort keys of objects (default: true)
+        """
+        #: Whether keys of objects are sorted
+        self.sort_keys = sort_keys  # type: bool
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object
+
+        :param obj: A JSON-compatible object
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                          sort_keys=self.sort_keys).encode('utf-8')
+
+
+class OrjsonSerializer(Serializer):
+    """A JSON encoder backed by ``orjson``"""
+
+    name = 'orjson'
+
+    def __init__(self, sort_keys: bool = True) -> None:
+        import orjson
+
+        super().__init__(sort_keys=sort_keys)
+        self._dumps = orjson.dumps  # type: Callable[..., bytes]
+        self._option = orjson.OPT_SORT_KEYS if sort_keys else 0  # type: int
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj, option=self._option)
+
+
+class UjsonSerializer(Serializer):
+    """A JSON encoder backed by ``ujson``"""
+
+    name = 'ujson'
+
+    def __init__(self, sort_keys: bool = True) -> None:
+        import ujson
+
+        super().__init__(sort_keys=sort_keys)
+        self._dumps = ujson.dumps  # type: Callable[..., str]
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj, ensure_ascii=False,
+                           sort_keys=self.sort_keys).encode('utf-8')
+
+
+_BACKENDS = {
+    'orjson': OrjsonSerializer,
+    'ujson': UjsonSerializer,
+    'json': Serializer,
+}  # type: Dict[str, Callable[..., Serializer]]
+
+
+def get_serializer(name: Optional[str] = None,
+                   sort_keys: bool = True) -> Serializer:
+    """Return a JSON encoder
+
+    :param name: (optional) ``orjson``, ``ujson`` or ``json``
+                 (default: the fastest installed one)
+    :param sort_keys: (optional) Sort keys of objects (default: true)
+    :raise ImportError: if the requested backend is not installed
+    """
+    if name is not None:
+        if name not in _BACKENDS:
+            raise ValueError('unknown JSON backend: ' + name)
+        return _BACKENDS[name](sort_keys=sort_keys)
+    for backend in ('orjson', 'ujson'):
+        try:
+            return _BACKENDS[backend](sort_keys=sort_keys)
+        except ImportError:
+            pass
+    return Serializer(sort_keys=sort_keys)
+
+
+def write_ndjson(images: Iterable[Union[Image, ImageList]],
+                 f: Any,
+                 serializer: Optional[Serializer] = None) -> int:
+    """Write images as JSON Lines, one image per line
+
+    Lines are written one by one, so no single string holding the whole
+    output is built. Items may be images or whole pages, e.g. from
+    :meth:`gyazo.Api.iter_image_lists`; raw records of lazy pages are
+    written as received from the API.
+
+    :param images: Images or pages of images
+    :param f: A writable binary or text file
+    :param serializer: (optional) JSON encoder
+                       (default: the fastest installed one)
+    :return: The number of lines written
+    """
+    if serializer is None:
+        serializer = get_serializer()
+    dumps = serializer.dumps
+    if isinstance(f, io.TextIOBase):
+        def write(data: bytes) -> Any:
+            return f.write(data.decode('utf-8'))
+    else:
+        write = f.write
+    lines = 0
+    for item in images:
+        if isinstance(item, ImageList):
+            records = item._to_list()
+        else:
+            records = [item.to_dict()]
+        for record in records:
+            write(dumps(record) + b'\n')
+            lines += 1
+    return lines
@@ -0,0 +1,209 @@
+import json
+import sqlite3
+from types import TracebackType
+from typing import (TYPE_CHECKING, Iterable, Iterator, List, Optional, Set,
+                    Type)
+
+from .batch import DownloadReport
+from .image import Image
+
+if TYPE_CHECKING:
+    from .api import Api
+
+
+def _failed_image_ids(images: List[Image],
+                      report: DownloadReport) -> List[str]:
+    urls = {failure.item[0] for failure in report.failures}
+    return [i.image_id for i in images
+            if i.image_id and (i.url in urls or i.thumb_url in urls)]
+
+
+class SyncResult:
+    """A class representing the outcome of a library sync"""
+
+    def __init__(self) -> None:
+        #: Images found since the previous sync, newest first
+        self.added = []  # type: List[Image]
+        #: IDs of images deleted since the previous sync
+        self.deleted = []  # type: List[str]
+        #: The number of pages requested
+        self.pages = 0  # type: int
+        #: The result of downloading added images, if requested
+        self.download_report = None  # type: Optional[DownloadReport]
+        #: IDs of added images whose download failed; they are left out of
+        #: the index so that the next sync finds them again
+        self.failed = []  # type: List[str]
+
+    def __repr__(self) -> str:
+        return 'SyncResult(added={}, deleted={}, pages={})'.format(
+            len(self.added), len(self.deleted), self.pages)
+
+
+class SyncIndex:
+    """A persistent local index of known images backed by SQLite
+
+    The index remembers which images have been seen, so that
+    :meth:`sync` only has to page through the library until it reaches an
+    image it already knows.
+    """
+
+    def __init__(self, path: str = ':memory:') -> None:
+        """
+        :param path: (optional) Path to the SQLite database file
+                     (default: an in-memory database)
+        """
+        #: Path to the SQLite database file
+        self.path = path  # type: str
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS images ('
+                ' image_id TEXT PRIMARY KEY,'
+                ' created_at REAL,'
+                ' data TEXT NOT NULL)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS images_created_at'
+                ' ON images (created_at)')
+
+    def __enter__(self) -> 'SyncIndex':
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        row = self._connection.execute('SELECT COUNT(*) FROM images')
+        return int(row.fetchone()[0])
+
+    def __contains__(self, image_id: object) -> bool:
+        row = self._connection.execute(
+            'SELECT 1 FROM images WHERE image_id = ?', (image_id,))
+        return row.fetchone() is not None
+
+    def close(self) -> None:
+        """Close the database"""
+        self._connection.close()
+
+    def image_ids(self) -> Set[str]:
+        """Return IDs of all known images"""
+        rows = self._connection.execute('SELECT image_id FROM images')
+        return {row[0] for row in rows}
+
+    def images(self) -> Iterator[Image]:
+        """Iterate over all known images, newest first"""
+        rows = self._connection.execute(
+            'SELECT data FROM images ORDER BY created_at DESC')
+        for row in rows:
+            yield Image.from_dict(json.loads(row[0]))
+
+    def add(self, images: Iterable[Image]) -> None:
+        """Add images to the index, replacing known ones
+
+        :param images: Images with an image ID
+        """
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO images (image_id, created_at, data)'
+                ' VALUES (?, ?, ?)',
+                ((i.image_id,
+                  i.created_at.timestamp() if i.created_at else None,
+                  i.to_json()) for i in images if i.image_id))
+
+    def remove(self, image_ids: Iterable[str]) -> None:
+        """Remove images from the index
+
+        :param image_ids: Image IDs
+        """
+        with self._connection:
+            self._connection.executemany(
+                'DELETE FROM images WHERE image_id = ?',
+                ((i,) for i in image_ids))
+
+    def sync(self,
+             api: 'Api',
+             per_page: int = 100,
+             detect_deletions: bool = False,
+             download_dir: Optional[str] = None,
+             thumbnails: bool = False,
+             max_workers: int = 4) -> SyncResult:
+        """Bring the index up to date with user's library
+
+        Pages are requested from the newest image until an image already in
+        the index is reached. With ``detect_deletions`` the whole library is
+        listed instead (pages are prefetched concurrently) and images that
+        disappeared are removed from the index. The index is only updated
+        once listing succeeded, so an interrupted sync can simply be rerun.
+
+        Images whose download failed are not added to the index. As an
+        incremental sync stops at the first known image, images newer than
+        a failed one are not added either; their files are already present
+        and skipped by the next sync.
+
+        :param api: An API client
+        :param per_page: (optional) Number of images per page
+                         (default: 100, min: 1, max: 100)
+        :param detect_deletions: (optional) List the whole library to find
+                                 deleted images (default: false)
+        :param download_dir: (optional) Download added images into this
+                             directory
+        :param thumbnails: (optional) Download thumbnails of added images
+                           as well (default: false)
+        :param max_workers: (optional) Maximum number of concurrent requests
+                            (default: 4)
+        :raise GyazoError:
+        """
+        result = SyncResult()
+        if detect_deletions:
+            known = self.image_ids()
+            seen = set()  # type: Set[str]
+            for images in api.iter_image_lists(per_page=per_page,
+                                               max_workers=max_workers):
+                result.pages += 1
+                for image in images:
+                    if image.image_id is None:
+                        continue
+                    seen.add(image.image_id)
+                    if image.image_id not in known:
+                        result.added.append(image)
+            result.deleted = sorted(known - seen)
+        else:
+            page = 1
+            done = False
+            while not done:
+                images = api.get_image_list(page=page, per_page=per_page,
+                                            lazy=True)
+                result.pages += 1
+                for image in images:
+                    if image.image_id is None:
+                        continue
+                    if image.image_id in self:
+                        done = True
+                        break
+                    result.added.append(image)
+                if not images.has_next_page:
+                    done = True
+                page += 1
+
+        if download_dir is not None:
+            result.download_report = api.download_images(
+                result.added, download_dir, thumbnails=thumbnails,
+                max_workers=max_workers)
+            result.failed = _failed_image_ids(result.added,
+                                              result.download_report)
+        indexed = result.added
+        if result.failed:
+            failed = set(result.failed)
+            if detect_deletions:
+                indexed = [i for i in indexed if i.image_id not in failed]
+            else:
+                oldest = max(n for n, i in enumerate(indexed)
+                             if i.image_id in failed)
+                indexed = indexed[oldest + 1:]
+        self.add(indexed)
+        self.remove(result.deleted)
+        if api.ocr_index is not None:
+            api.ocr_index.remove(result.deleted)
+        return result
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+
+from gyazo.aio import AsyncApi
+from gyazo.error import GyazoError
+from gyazo.image import Image
+
+RECORD = {'image_id': 'abc', 'type': 'png',
+          'created_at': '2020-02-01T13:31:00+0000'}
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def api():
+    api = AsyncApi(max_concurrency=2, transport='threads')
+    yield api
+    api.close()
+
+
+def test_get_image(api, mocker):
+    image = Image(type='png', created_at=None, image_id='abc')
+    mock_get_image = mocker.patch.object(api.api, 'get_image',
+                                         return_value=image)
+
+    assert run(api.get_image('abc')) is image
+    mock_get_image.assert_called_once_with('abc')
+
+
+def test_error_is_propagated(api, mocker):
+    mocker.patch.object(api.api, 'delete_image',
+                        side_effect=GyazoError('image not found.'))
+
+    with pytest.raises(GyazoError):
+        run(api.delete_image('abc'))
+
+
+def test_gather(api, mocker):
+    mocker.patch.object(api.api, 'get_oembed',
+                        side_effect=lambda url: {'url': url})
+
+    async def fetch_all():
+        return await asyncio.gather(
+            *[api.get_oembed(str(i)) for i in range(10)])
+
+    results = run(fetch_all())
+    assert [r['url'] for r in results] == [str(i) for i in range(10)]
+
+
+def test_download_without_url(api):
+    image = Image(type='png', created_at=None)
+    assert run(api.download(image)) is None
+
+
+def test_aexit_shuts_down_threads():
+    async def use():
+        async with AsyncApi(transport='threads') as api:
+            pass
+        return api
+
+    api = run(use())
+    with pytest.raises(RuntimeError):
+        api._executor.submit(print)
+
+
+def test_unknown_transport():
+    with pytest.raises(ValueError):
+        AsyncApi(transport='curl')
+
+
+class TestHttpxTransport:
+    @pytest.fixture
+    def httpx(self):
+        return pytest.importorskip('httpx')
+
+    def make_api(self, httpx, handler, **kwargs):
+        api = AsyncApi(access_token='token', transport='httpx', **kwargs)
+        api._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler))
+        return api
+
+    def test_default_transport(self, httpx):
+        assert AsyncApi().transport == 'httpx'
+
+    def test_get_image_list(self, httpx):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(
+                200, json=[RECORD],
+                headers={'X-Total-Count': '1', 'X-Current-Page': '2',
+                         'X-Per-Page': '10'})
+
+        async def use():
+            async with self.make_api(httpx, handler) as api:
+                return await api.get_image_list(page=2, per_page=10)
+
+        images = run(use())
+        assert [i.image_id for i in images] == ['abc']
+        assert images.total_count == 1
+        assert requests[0].url.params['page'] == '2'
+        assert requests[0].headers['Authorization'] == 'Bearer token'
+
+    def test_error_without_json_body(self, httpx):
+        def handler(request):
+            return httpx.Response(404, text='<html></html>')
+
+        async def use():
+            async with self.make_api(httpx, handler) as api:
+                await api.delete_image('abc')
+
+        with pytest.raises(GyazoError) as excinfo:
+            run(use())
+        assert excinfo.value.status_code == 404
+
+    def test_get_is_retried(self, httpx):
+        statuses = [503, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), json={'url': 'x'})
+
+        async def use():
+            api = self.make_api(httpx, handler)
+            api.api.retry.backoff_factor = 0
+            async with api:
+                return await api.get_oembed('x')
+
+        assert run(use()) == {'url': 'x'}
+        assert statuses == []
+
+    def test_upload_streams_file(self, httpx, tmp_path):
+        path = tmp_path / 'image.png'
+        path.write_bytes(b'\x89PNG' * 100)
+        bodies = []
+
+        def handler(request):
+            bodies.append(request.read())
+            return httpx.Response(200, json=RECORD)
+
+        async def use():
+            async with self.make_api(httpx, handler) as api:
+                return await api.upload_image(str(path), title='t',
+                                              chunk_size=64)
+
+        image = run(use())
+        assert image.image_id == 'abc'
+        assert b'\x89PNG' * 100 in bodies[0]
+        assert b'name="title"' in bodies[0]
+
+    def test_download(self, httpx):
+        def handler(request):
+            if request.url.path == '/missing.png':
+                return httpx.Response(404)
+            return httpx.Response(200, content=b'png')
+
+        async def use():
+            async with self.make_api(httpx, handler) as api:
+                found = await api.download(Image(
+                    type='png', created_at=None,
+                    url='https://i.gyazo.com/abc.png'))
+                with pytest.raises(GyazoError):
+                    await api.download(Image(
+                        type='png', created_at=None,
+                        url='https://i.gyazo.com/missing.png'))
+                return found
+
+        assert run(use()) == b'png'
+
+    def test_close_requires_aclose(self, httpx):
+        api = self.make_api(httpx, lambda request: httpx.Response(200))
+        with pytest.raises(RuntimeError):
+            api.close()
+        run(api.aclose())
+        api.close()
@@ -2,7 +2,11 @@ import pytest
 from requests.structures import CaseInsensitiveDict
 
 from gyazo.api import Api
+from gyazo.batch import UploadItem
+from gyazo.cache import LRUCache
 from gyazo.error import GyazoError
+from gyazo.image import Image, ImageList
+from gyazo.ratelimit import RetryPolicy
 
 
 @pytest.fixture
@@ -71,3 +75,323 @@ def test_parse_and_check_error_status_code_without_message(api, mocker):
 
     with pytest.raises(GyazoError):
         api._parse_and_check(mock_response)
+
+
+def test_get_session_per_host(api):
+    s1 = api.get_session("https://api.gyazo.com/api/images")
+    s2 = api.get_session("https://api.gyazo.com/api/oembed")
+    s3 = api.get_session("https://upload.gyazo.com/api/upload")
+    assert s1 is s2
+    assert s1 is not s3
+
+
+def test_request_url_uses_pooled_session(mocker):
+    api = Api(access_token="token", timeout=5)
+    session = api.get_session(api.api_url)
+    mock_request = mocker.patch.object(session, "request")
+    mock_request.return_value.status_code = 200
+    mock_request.return_value.headers = CaseInsensitiveDict()
+
+    api._request_url(api.api_url + "/api/images", "get",
+                     with_access_token=True)
+
+    mock_request.assert_called_once()
+    _, kwargs = mock_request.call_args
+    assert kwargs["timeout"] == 5
+    assert kwargs["headers"]["Authorization"] == "Bearer token"
+
+
+def test_context_manager_closes_sessions(mocker):
+    with Api() as api:
+        session = api.get_session(api.api_url)
+        mock_close = mocker.patch.object(session, "close")
+    mock_close.assert_called_once_with()
+    assert api.get_session(api.api_url) is not session
+
+
+def _image_list_page(page, per_page, total_count):
+    start = (page - 1) * per_page
+    stop = min(start + per_page, total_count)
+    images = ImageList.from_list([
+        {"image_id": str(i), "type": "png",
+         "created_at": "2014-07-25T08:29:51+0000"}
+        for i in range(start, stop)
+    ])
+    images.set_attributes_from_headers({
+        "x-total-count": str(total_count),
+        "x-current-page": str(page),
+        "x-per-page": str(per_page),
+    })
+    return images
+
+
+def test_iter_images(api, mocker):
+    mock_get_image_list = mocker.patch.object(
+        api, "get_image_list",
+        side_effect=lambda page, per_page, **kwargs: _image_list_page(
+            page, per_page, 25))
+
+    images = list(api.iter_images(per_page=10, max_workers=2))
+
+    assert [i.image_id for i in images] == [str(i) for i in range(25)]
+    assert mock_get_image_list.call_count == 3
+
+
+def test_iter_image_lists_single_page(api, mocker):
+    mocker.patch.object(
+        api, "get_image_list",
+        side_effect=lambda page, per_page, **kwargs: _image_list_page(
+            page, per_page, 5))
+
+    pages = list(api.iter_image_lists(per_page=10))
+
+    assert len(pages) == 1
+    assert len(pages[0]) == 5
+
+
+def test_upload_images(api, mocker, tmp_path):
+    path = tmp_path / "a.png"
+
+    def upload_image(image_file, **kwargs):
+        if kwargs["title"] == "bad":
+            raise GyazoError("failed")
+        assert image_file == str(path)
+        return kwargs["title"]
+
+    mocker.patch.object(api, "upload_image", side_effect=upload_image)
+
+    results = list(api.upload_images([
+        UploadItem(str(path), title="good"),
+        UploadItem(str(path), title="bad"),
+    ], max_workers=2))
+
+    assert sorted((r.item.title, r.ok) for r in results) == [
+        ("bad", False), ("good", True)]
+
+
+def test_download_images(api, mocker, tmp_path):
+    images = ImageList.from_list([
+        {"type": "png", "created_at": "2014-07-25T08:29:51+0000",
+         "url": "https://i.gyazo.com/" + name + ".png",
+         "thumb_url": "https://i.gyazo.com/thumb/" + name + "_t.png"}
+        for name in ("a", "b", "c")
+    ])
+    (tmp_path / "a.png").write_bytes(b"old")
+
+    def download_stream(url, f, chunk_size, session):
+        if url.endswith("c.png"):
+            raise GyazoError("not found")
+        f.write(b"new")
+        return 3
+
+    mocker.patch("gyazo.image._download_stream", side_effect=download_stream)
+
+    report = api.download_images(images, str(tmp_path), thumbnails=True,
+                                 max_workers=2)
+
+    assert report.downloaded == 4
+    assert report.skipped == 1
+    assert report.bytes == 12
+    assert len(report.failures) == 1
+    assert report.failures[0].item == ("https://i.gyazo.com/c.png",
+                                       str(tmp_path / "c.png"))
+    assert (tmp_path / "a.png").read_bytes() == b"old"
+    assert (tmp_path / "b.png").read_bytes() == b"new"
+    assert (tmp_path / "c_t.png").read_bytes() == b"new"
+    assert not (tmp_path / "c.png").exists()
+    assert not (tmp_path / "c.png.part").exists()
+
+
+def test_get_image_cache(mocker):
+    api = Api(cache=LRUCache())
+    data = {"image_id": "abc", "type": "png",
+            "created_at": "2014-07-25T08:29:51+0000",
+            "permalink_url": "https://gyazo.com/abc"}
+    mock_request = mocker.patch.object(api, "_request_url")
+    mocker.patch.object(api, "_parse_and_check", return_value=({}, data))
+
+    assert api.get_image("abc").image_id == "abc"
+    assert api.get_image("abc").image_id == "abc"
+    assert mock_request.call_count == 1
+    assert api.cache.hits == 1
+
+    api.delete_image("abc")
+    api.get_image("abc")
+    assert mock_request.call_count == 3
+
+
+def _response(mocker, status_code, headers=None, json_data=None,
+              content=b""):
+    response = mocker.MagicMock()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.json.return_value = json_data
+    response.content = content
+    return response
+
+
+def test_get_image_list_conditional_request(mocker):
+    api = Api(conditional_requests=True)
+    data = [{"image_id": "abc", "type": "png",
+             "created_at": "2014-07-25T08:29:51+0000"}]
+    mock_request = mocker.patch.object(api, "_request_url", side_effect=[
+        _response(mocker, 200, {"ETag": '"v1"', "x-total-count": "1"},
+                  data),
+        _response(mocker, 304),
+        _response(mocker, 304),
+    ])
+
+    first = api.get_image_list(lazy=True)
+    second = api.get_image_list()
+    third = api.get_image_list()
+
+    assert first.is_lazy
+    assert not second.is_lazy
+    assert second.images == first.images
+    assert second.total_count == 1
+    # Each call builds its own images from the remembered JSON
+    assert second[0] is not third[0]
+    assert mock_request.call_args_list[0][1]["headers"] == {}
+    assert mock_request.call_args_list[1][1]["headers"] == {
+        "If-None-Match": '"v1"'}
+
+
+def test_iter_image_lists_does_not_remember_pages(mocker):
+    api = Api(conditional_requests=True)
+    data = [{"image_id": "abc", "type": "png",
+             "created_at": "2014-07-25T08:29:51+0000"}]
+    mocker.patch.object(api, "_request_url", return_value=_response(
+        mocker, 200, {"ETag": '"v1"', "x-total-count": "1"}, data))
+
+    assert len(list(api.iter_image_lists())) == 1
+    assert len(api._validators) == 0
+
+
+def test_conditional_requests_are_opt_in(api):
+    assert api._validators is None
+
+
+def test_download_image_does_not_keep_bytes(mocker):
+    api = Api(conditional_requests=True)
+    image = Image(type="png", created_at=None,
+                  url="https://i.gyazo.com/abc.png")
+    mock_request = mocker.patch.object(api, "_request_url", side_effect=[
+        _response(mocker, 200, {"ETag": '"v1"'}, content=b"png"),
+        _response(mocker, 200, {"ETag": '"v1"'}, content=b"png"),
+    ])
+
+    assert api.download_image(image) == b"png"
+    assert api.download_image(image) == b"png"
+    assert "headers" not in mock_request.call_args_list[1][1]
+    assert len(api._validators) == 0
+
+
+def test_conditional_requests_disabled(mocker):
+    api = Api(conditional_requests=False)
+    data = {"image_id": "abc", "type": "png",
+            "created_at": "2014-07-25T08:29:51+0000"}
+    mock_request = mocker.patch.object(api, "_request_url", side_effect=[
+        _response(mocker, 200, {"ETag": '"v1"'}, data),
+        _response(mocker, 200, {"ETag": '"v1"'}, data),
+    ])
+
+    api.get_image("abc")
+    api.get_image("abc")
+
+    assert mock_request.call_args_list[1][1]["headers"] == {}
+
+
+def test_request_url_retries_get(mocker):
+    api = Api(retry=RetryPolicy(max_retries=2, jitter=False))
+    clock = {"now": 100.0}
+    mocker.patch("time.monotonic", side_effect=lambda: clock["now"])
+    mock_sleep = mocker.patch(
+        "time.sleep",
+        side_effect=lambda s: clock.update(now=clock["now"] + s))
+    session = api.get_session(api.api_url)
+    mocker.patch.object(session, "request", side_effect=[
+        _response(mocker, 503),
+        _response(mocker, 429, {"Retry-After": "2"}),
+        _response(mocker, 200),
+    ])
+
+    response = api._request_url(api.api_url + "/api/images", "get")
+
+    assert response.status_code == 200
+    # Backoff after 503, then a shared pause requested by Retry-After
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [0.5, 2.0]
+
+
+def test_request_url_does_not_retry_post(mocker):
+    api = Api()
+    session = api.get_session(api.upload_url)
+    mock_request = mocker.patch.object(session, "request",
+                                       return_value=_response(mocker, 503))
+
+    response = api._request_url(api.upload_url + "/api/upload", "post")
+
+    assert response.status_code == 503
+    assert mock_request.call_count == 1
+
+
+def test_parse_and_check_error_has_status_code(api, mocker):
+    response = _response(mocker, 429, {"Retry-After": "30"},
+                         {"message": "Too many requests"})
+
+    with pytest.raises(GyazoError) as excinfo:
+        api._parse_and_check(response)
+
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.retry_after == 30.0
+
+
+def test_parse_and_check_error_without_json_body(api, mocker):
+    response = _response(mocker, 502, {"Content-Type": "text/html"}, None)
+    response.json.side_effect = ValueError
+    response.reason = "Bad Gateway"
+
+    with pytest.raises(GyazoError) as excinfo:
+        api._parse_and_check(response)
+
+    assert str(excinfo.value) == "Bad Gateway"
+    assert excinfo.value.status_code == 502
+
+
+def _dated_image(image_id, created_at):
+    return Image.from_dict({"image_id": image_id, "type": "png",
+                            "created_at": created_at})
+
+
+def test_delete_images_reports_failures(api, mocker):
+    def delete_image(image_id):
+        if image_id == "missing":
+            raise GyazoError("image not found.", status_code=404)
+        return _dated_image(image_id, "2014-07-25T08:29:51+0000")
+    mocker.patch.object(api, "delete_image", side_effect=delete_image)
+
+    images = ImageList.from_list([{"image_id": "b", "type": "png",
+                                   "created_at": "2014-07-25T08:29:51+0000"}])
+    results = {r.item: r for r in api.delete_images(["a", "missing"])}
+    results.update({r.item: r for r in api.delete_images(images)})
+
+    assert results["a"].result.image_id == "a"
+    assert results["b"].ok
+    assert results["missing"].error.status_code == 404
+
+
+def test_delete_images_dry_run_with_filters(api, mocker):
+    from datetime import datetime
+
+    mock_delete = mocker.patch.object(api, "delete_image")
+    mocker.patch.object(api, "get_image", side_effect=lambda image_id:
+                        _dated_image(image_id, "2015-01-01T00:00:00+0000"))
+    old = _dated_image("old", "2013-01-01T00:00:00+0000")
+    new = _dated_image("new", "2016-01-01T00:00:00+0000")
+
+    results = list(api.delete_images([old, new, "looked-up"], dry_run=True,
+                                     created_after=datetime(2014, 1, 1),
+                                     created_before=datetime(2016, 1, 1)))
+
+    assert [r.item for r in results] == ["looked-up"]
+    assert results[0].result.image_id == "looked-up"
+    mock_delete.assert_not_called()
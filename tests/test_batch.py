@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from gyazo.batch import BatchResult, UploadItem, run_concurrently
+from gyazo.error import GyazoError
+
+
+def test_run_concurrently_collects_errors():
+    def func(x):
+        if x == 3:
+            raise GyazoError('failed')
+        return x * 2
+
+    results = list(run_concurrently(func, range(6), max_workers=2))
+
+    assert sorted(r.item for r in results) == list(range(6))
+    failed = [r for r in results if not r.ok]
+    assert len(failed) == 1
+    assert failed[0].item == 3
+    assert isinstance(failed[0].error, GyazoError)
+    assert sorted(r.result for r in results if r.ok) == [0, 2, 4, 8, 10]
+
+
+def test_run_concurrently_bounds_in_flight():
+    lock = threading.Lock()
+    state = {'current': 0, 'peak': 0}
+
+    def func(x):
+        with lock:
+            state['current'] += 1
+            state['peak'] = max(state['peak'], state['current'])
+        time.sleep(0.01)
+        with lock:
+            state['current'] -= 1
+        return x
+
+    results = list(run_concurrently(func, range(20), max_workers=3))
+
+    assert len(results) == 20
+    assert state['peak'] <= 3
+
+
+def test_run_concurrently_invalid_max_workers():
+    with pytest.raises(ValueError):
+        list(run_concurrently(lambda x: x, [1], max_workers=0))
+
+
+def test_batch_result_ok():
+    assert BatchResult('a', result=1).ok
+    assert not BatchResult('a', error=GyazoError('x')).ok
+
+
+def test_upload_item_metadata():
+    item = UploadItem('a.png', title='title', collection_id='c')
+    assert item.metadata() == {
+        'referer_url': None,
+        'title': 'title',
+        'desc': None,
+        'created_at': None,
+        'collection_id': 'c',
+    }
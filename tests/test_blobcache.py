@@ -0,0 +1,116 @@
+import os
+
+import pytest
+import requests
+
+from gyazo.blobcache import BlobCache
+from gyazo.error import GyazoError
+from gyazo.image import Image
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BlobCache(str(tmp_path / 'cache'), max_bytes=10)
+
+
+def test_put_and_get(cache):
+    assert cache.get('abc.png') is None
+    cache.put('abc.png', b'1234')
+
+    assert 'abc.png' in cache
+    assert cache.get('abc.png') == b'1234'
+    with cache.open('abc.png') as mapped:
+        assert mapped[:2] == b'12'
+    assert cache.hits == 2
+    assert cache.misses == 1
+    assert cache.bytes_served == 8
+    assert cache.size == 4
+
+
+def test_empty_content_is_not_stored(cache):
+    cache.put('abc.png', b'')
+    assert 'abc.png' not in cache
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=12)
+    for n, key in enumerate(['a.png', 'b.png', 'c.png']):
+        cache.put(key, b'1234')
+        os.utime(cache.path(key), (n, n))
+    cache.get('a.png')
+    os.utime(cache.path('a.png'), (10, 10))
+
+    cache.put('d.png', b'1234')
+
+    # Evicted down to 90% of max_bytes
+    assert 'a.png' in cache
+    assert 'b.png' not in cache
+    assert 'c.png' not in cache
+    assert 'd.png' in cache
+    assert cache.size == 8
+
+
+def test_evict_leaves_headroom(tmp_path, mocker):
+    cache = BlobCache(str(tmp_path), max_bytes=100, low_water=0.5)
+    for n in range(6):
+        cache.put('{}.png'.format(n), b'0123456789' * 2)
+    assert cache.size <= 50
+
+    evict = mocker.spy(cache, 'evict')
+    cache.put('6.png', b'0123456789' * 2)
+    cache.put('7.png', b'0123456789' * 2)
+
+    assert evict.call_count == 0
+
+
+def test_invalid_low_water(tmp_path):
+    with pytest.raises(ValueError):
+        BlobCache(str(tmp_path), low_water=1.5)
+
+
+def test_size_is_restored(cache):
+    cache.put('abc.png', b'1234')
+    assert BlobCache(cache.directory).size == 4
+
+
+def test_delete(cache):
+    cache.put('abc.png', b'1234')
+    cache.delete('abc.png')
+    cache.delete('abc.png')
+    assert 'abc.png' not in cache
+    assert cache.size == 0
+
+
+@pytest.mark.parametrize('key', ['', '..', 'a/b.png'])
+def test_invalid_key(cache, key):
+    with pytest.raises(ValueError):
+        cache.path(key)
+
+
+def test_image_download_uses_cache(cache, mocker):
+    image = Image(type='png', created_at=None,
+                  url='https://i.gyazo.com/abc.png')
+    response = mocker.MagicMock()
+    response.content = b'png'
+    mock_get = mocker.patch('requests.get', return_value=response)
+
+    assert image.download(cache=cache) == b'png'
+    assert image.download(cache=cache) == b'png'
+
+    mock_get.assert_called_once_with('https://i.gyazo.com/abc.png')
+    assert cache.get('abc.png') == b'png'
+
+
+def test_image_download_error_has_status_code(cache, mocker):
+    image = Image(type='png', created_at=None,
+                  url='https://i.gyazo.com/abc.png')
+    response = mocker.MagicMock()
+    response.status_code = 404
+    response.raise_for_status.side_effect = requests.HTTPError('404')
+    mocker.patch('requests.get', return_value=response)
+
+    with pytest.raises(GyazoError) as excinfo:
+        image.download(cache=cache)
+
+    assert excinfo.value.status_code == 404
+    assert 'abc.png' not in cache
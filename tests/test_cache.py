@@ -0,0 +1,52 @@
+import pytest
+
+from gyazo.cache import LRUCache
+
+
+def test_get_and_set():
+    cache = LRUCache()
+    assert cache.get('a') is None
+    cache.set('a', {'x': 1})
+    assert cache.get('a') == {'x': 1}
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_ttl_expiry(mocker):
+    now = mocker.patch('time.monotonic', return_value=100.0)
+    cache = LRUCache(ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=30)
+    now.return_value = 115.0
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+
+
+def test_delete_and_clear():
+    cache = LRUCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.delete('a')
+    cache.delete('missing')
+    assert cache.get('a') is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_invalid_maxsize():
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
@@ -0,0 +1,71 @@
+import io
+import json
+
+from gyazo.api import Api
+from gyazo.batch import DownloadReport
+from gyazo.cli import main
+from gyazo.error import GyazoError
+from gyazo.image import Image, ImageList
+
+
+def _record(image_id):
+    return {'image_id': image_id, 'type': 'png',
+            'created_at': '2014-07-25T08:29:51+0000'}
+
+
+def _lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_upload_globs(mocker, tmp_path, capsys):
+    for name in ['a.png', 'b.png', 'c.txt']:
+        (tmp_path / name).write_bytes(b'1234')
+    upload = mocker.patch.object(
+        Api, 'upload_image',
+        side_effect=lambda path, **kwargs: Image.from_dict(
+            _record(path[-5])))
+
+    assert main(['upload', '-j', '2', '--title', 'T',
+                 str(tmp_path / '*.png')]) == 0
+
+    lines = sorted(_lines(capsys), key=lambda r: r['image_id'])
+    assert [r['image_id'] for r in lines] == ['a', 'b']
+    assert lines[0]['path'] == str(tmp_path / 'a.png')
+    assert upload.call_args[1]['title'] == 'T'
+
+
+def test_list(mocker, capsys):
+    images = ImageList.from_list([_record('a'), _record('b')], lazy=True)
+    mocker.patch.object(Api, 'iter_image_lists', return_value=iter([images]))
+
+    assert main(['list']) == 0
+    assert [r['image_id'] for r in _lines(capsys)] == ['a', 'b']
+
+
+def test_mirror(mocker, tmp_path):
+    report = DownloadReport()
+    report.downloaded = 2
+    mocker.patch.object(Api, 'iter_images', return_value=iter([]))
+    download = mocker.patch.object(Api, 'download_images',
+                                   return_value=report)
+
+    assert main(['mirror', str(tmp_path), '--thumbnails']) == 0
+    assert download.call_args[1]['thumbnails'] is True
+    assert download.call_args[1]['skip_existing'] is True
+
+
+def test_delete_reads_stdin(mocker, monkeypatch, capsys):
+    def delete_image(image_id):
+        if image_id == 'missing':
+            raise GyazoError('image not found.', status_code=404)
+        return Image.from_dict(_record(image_id))
+    mocker.patch.object(Api, 'delete_image', side_effect=delete_image)
+    monkeypatch.setattr('sys.stdin', io.StringIO('b\nmissing\n'))
+
+    assert main(['delete', 'a', '-']) == 1
+
+    captured = capsys.readouterr()
+    ids = sorted(json.loads(line)['image_id']
+                 for line in captured.out.splitlines())
+    assert ids == ['a', 'b']
+    assert 'missing' in captured.err
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from gyazo.columnar import COLUMNS, ImageColumns
+from gyazo.image import ImageList
+
+
+records = [
+    {
+        'image_id': 'abc',
+        'type': 'png',
+        'created_at': '2020-02-01T13:31:37.197+0000',
+        'url': 'https://i.gyazo.com/abc.png',
+        'thumb_url': '',
+        'ocr': {'locale': 'ja', 'description': 'text'},
+    },
+    {
+        'image_id': 'def',
+        'type': 'gif',
+        'created_at': '1970-01-01T09:00:01+0900',
+        'permalink_url': 'https://gyazo.com/def',
+    },
+]
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_to_columns(lazy):
+    columns = ImageList.from_list(records, lazy=lazy).to_columns()
+
+    assert len(columns) == 2
+    assert columns.image_id == ['abc', 'def']
+    assert list(columns.created_at) == [1580563897197, 1000]
+    assert columns.type == ['png', 'gif']
+    assert columns.url == ['https://i.gyazo.com/abc.png', None]
+    assert columns.thumb_url == [None, None]
+    assert columns.permalink_url == [None, 'https://gyazo.com/def']
+    assert columns.ocr_locale == ['ja', None]
+    assert columns.ocr_description == ['text', None]
+
+
+def test_clear():
+    columns = ImageList.from_list(records).to_columns()
+    columns.clear()
+    assert len(columns) == 0
+    assert columns.image_id == []
+
+
+def test_to_numpy():
+    pytest.importorskip('numpy')
+    array = ImageList.from_list(records).to_columns().to_numpy()
+
+    assert array.dtype.names == COLUMNS
+    assert list(array['created_at']) == [1580563897197, 1000]
+    assert list(array['image_id']) == ['abc', 'def']
+
+
+def test_write_parquet_and_ipc():
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+    from gyazo.columnar import write_arrow_ipc, write_parquet
+
+    pages = [ImageList.from_list(records, lazy=True),
+             ImageList.from_list(records)]
+
+    buffer = io.BytesIO()
+    assert write_parquet(pages, buffer, rows_per_batch=3) == 4
+    buffer.seek(0)
+    table = pyarrow.parquet.read_table(buffer)
+    assert table.column_names == list(COLUMNS)
+    assert table.column('image_id').to_pylist() == ['abc', 'def'] * 2
+
+    buffer = io.BytesIO()
+    assert write_arrow_ipc(pages, buffer) == 4
+    table = pyarrow.ipc.open_stream(buffer.getvalue()).read_all()
+    assert table.num_rows == 4
+    assert str(table.schema.field('created_at').type) == 'timestamp[ms, tz=UTC]'
@@ -0,0 +1,89 @@
+import hashlib
+import io
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from gyazo.api import Api
+from gyazo.dedup import UploadIndex, hash_file
+from gyazo.image import Image
+
+
+def _record(image_id):
+    return {'image_id': image_id, 'type': 'png',
+            'created_at': '2014-07-25T08:29:51+0000'}
+
+
+def test_hash_file_path(tmp_path):
+    path = tmp_path / 'a.png'
+    path.write_bytes(b'x' * 100)
+    assert hash_file(str(path), chunk_size=7) == \
+        hashlib.sha256(b'x' * 100).hexdigest()
+
+
+def test_hash_file_restores_position():
+    f = io.BytesIO(b'0123456789')
+    f.seek(4)
+    assert hash_file(f) == hashlib.sha256(b'456789').hexdigest()
+    assert f.tell() == 4
+
+
+def test_hash_file_iterable():
+    assert hash_file(iter([b'123'])) is None
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / 'uploads.db')
+    image = Image.from_dict(_record('abc'))
+    with UploadIndex(path) as index:
+        index.add('digest', image)
+        index.add('digest', Image.from_dict(_record('def')))
+    with UploadIndex(path) as index:
+        assert len(index) == 1
+        assert index.get('digest') == image
+        assert index.get('other') is None
+        assert index.hits == 1
+        index.remove_image('abc')
+        assert len(index) == 0
+
+
+@pytest.fixture
+def api():
+    return Api(upload_index=UploadIndex())
+
+
+def _upload_response(mocker, image_id):
+    response = mocker.MagicMock()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict()
+    response.json.return_value = _record(image_id)
+    return response
+
+
+def test_upload_image_skips_duplicates(api, mocker, tmp_path):
+    mock_request = mocker.patch.object(api, '_request_url', side_effect=[
+        _upload_response(mocker, 'abc'),
+        _upload_response(mocker, 'def'),
+    ])
+    first = tmp_path / 'a.png'
+    first.write_bytes(b'1234')
+    second = tmp_path / 'b.png'
+    second.write_bytes(b'1234')
+
+    assert api.upload_image(str(first)).image_id == 'abc'
+    assert api.upload_image(str(second)).image_id == 'abc'
+    assert api.upload_image(io.BytesIO(b'5678')).image_id == 'def'
+    assert mock_request.call_count == 2
+    assert api.upload_index.hits == 1
+
+
+def test_delete_image_forgets_upload(api, mocker):
+    mocker.patch.object(api, '_request_url', side_effect=[
+        _upload_response(mocker, 'abc'),
+        _upload_response(mocker, 'abc'),
+        _upload_response(mocker, 'def'),
+    ])
+    api.upload_image(io.BytesIO(b'1234'))
+    api.delete_image('abc')
+
+    assert api.upload_image(io.BytesIO(b'1234')).image_id == 'def'
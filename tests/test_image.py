@@ -1,8 +1,15 @@
+import copy
+import io
+import json
+import os
 from datetime import datetime, timedelta, timezone
 
+import dateutil.parser
 import pytest
+import requests
 
-from gyazo.image import Image, ImageList
+from gyazo.error import GyazoError
+from gyazo.image import Image, ImageList, format_datetime, parse_datetime
 
 
 image_1_dict = {
@@ -233,3 +240,138 @@ class TestImageList:
         assert il.current_page == 1
         assert il.per_page == 20
         assert il.user_type == 'ninja'
+
+
+class TestImageDownload:
+    @pytest.fixture
+    def mock_get(self, mocker):
+        response = mocker.MagicMock()
+        response.iter_content.return_value = [b'abc', b'de']
+        return mocker.patch('requests.get', return_value=response)
+
+    def test_download_to_path(self, mock_get, tmp_path):
+        path = tmp_path / image_1.filename
+        assert image_1.download_to(str(path), chunk_size=3) == 5
+        assert path.read_bytes() == b'abcde'
+        mock_get.assert_called_once_with(image_1.url, stream=True)
+        mock_get.return_value.iter_content.assert_called_once_with(
+            chunk_size=3)
+
+    def test_download_to_path_keeps_file_on_error(self, mock_get, tmp_path):
+        def iter_content(chunk_size):
+            yield b'abc'
+            raise requests.ConnectionError('connection reset')
+
+        mock_get.return_value.iter_content.side_effect = iter_content
+        path = tmp_path / image_1.filename
+        path.write_bytes(b'old')
+
+        with pytest.raises(GyazoError):
+            image_1.download_to(str(path))
+        assert path.read_bytes() == b'old'
+        assert os.listdir(str(tmp_path)) == [image_1.filename]
+
+    def test_download_to_file(self, mock_get):
+        f = io.BytesIO()
+        assert image_1.download_thumb_to(f) == 5
+        assert f.getvalue() == b'abcde'
+
+    def test_download_to_callable(self, mock_get):
+        chunks = []
+        assert image_1.download_to(chunks.append) == 5
+        assert chunks == [b'abc', b'de']
+
+    def test_download_to_without_url(self, mock_get):
+        assert image_2.download_to(io.BytesIO()) is None
+        mock_get.assert_not_called()
+
+
+@pytest.mark.parametrize('value', [
+    '2014-07-25T08:29:51+0000',
+    '2020-02-01T13:31:37.197+0000',
+    '2014-06-21T13:45:46+0900',
+    '2014-06-21T13:45:46-05:30',
+    '2014-06-21T13:45:46.123456Z',
+    '2014-06-21 13:45:46+00:00',
+    'July 25 2014 08:29:51 UTC',
+    '2014-02-30T13:45:46+0900',
+])
+def test_parse_datetime(value):
+    try:
+        expected = dateutil.parser.parse(value)
+    except ValueError:
+        with pytest.raises(ValueError):
+            parse_datetime(value)
+    else:
+        actual = parse_datetime(value)
+        assert actual == expected
+        assert actual.utcoffset() == expected.utcoffset()
+
+
+class TestLazyImageList:
+    def test_builds_images_on_access(self, mocker):
+        from_dict = mocker.spy(Image, 'from_dict')
+        l = ImageList.from_list([image_1_dict, image_2_dict], lazy=True)
+
+        assert len(l) == 2
+        assert l.is_lazy
+        assert from_dict.call_count == 0
+        assert l[1] == image_2
+        assert l[1] is l[1]
+        assert from_dict.call_count == 1
+        assert list(l) == [image_1, image_2]
+        assert from_dict.call_count == 2
+
+    def test_to_json_passes_raw_records(self):
+        l = ImageList.from_list([image_4_dict_with_none, image_2_dict],
+                                lazy=True)
+        l[1] = image_1
+
+        assert json.loads(l.to_json()) == [image_4_dict_with_none,
+                                           image_1_dict]
+
+    def test_delitem(self):
+        l = ImageList.from_list([image_1_dict, image_2_dict], lazy=True)
+        del l[0]
+
+        assert list(l) == [image_2]
+        assert json.loads(l.to_json()) == [image_2_dict]
+
+    def test_setitem_slice_of_other_length(self):
+        l = ImageList.from_list([image_1_dict, image_2_dict], lazy=True)
+        l[:1] = [image_2, image_2, image_2]
+
+        assert l.is_lazy
+        assert list(l) == [image_2, image_2, image_2, image_2]
+        assert json.loads(l.to_json()) == [image_2_dict] * 4
+
+        l[1:] = []
+
+        assert list(l) == [image_2]
+
+    def test_images_materializes(self):
+        l = ImageList.from_list([image_1_dict, image_2_dict], lazy=True)
+
+        assert l.images == [image_1, image_2]
+        assert not l.is_lazy
+
+    def test_copy(self):
+        l = ImageList.from_list([image_1_dict], lazy=True)
+        c = copy.copy(l)
+        c[0] = image_2
+
+        assert l[0] == image_1
+        assert c[0] == image_2
+
+
+@pytest.mark.parametrize('value', [
+    datetime(2014, 7, 25, 8, 29, 51, tzinfo=timezone.utc),
+    datetime(2014, 7, 25, 8, 29, 51, 197000,
+             tzinfo=timezone(timedelta(hours=9))),
+    datetime(2014, 7, 25, 8, 29, 51,
+             tzinfo=timezone(-timedelta(hours=5, minutes=30))),
+    datetime(2014, 7, 25, 8, 29, 51),
+    datetime(14, 7, 25, 8, 29, 51, tzinfo=timezone(timedelta(seconds=30))),
+])
+def test_format_datetime(value):
+    assert format_datetime(value) == value.strftime('%Y-%m-%dT%H:%M:%S%z')
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+
+def _loaded_modules(statement):
+    code = statement + '\nimport sys\nprint(" ".join(sys.modules))'
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     universal_newlines=True)
+    return set(output.split())
+
+
+def test_import_models_is_lightweight():
+    modules = _loaded_modules(
+        'from gyazo import GyazoError, Image, ImageList, __version__')
+    assert 'requests' not in modules
+    assert 'dateutil' not in modules
+    assert 'asyncio' not in modules
+    assert 'gyazo.api' not in modules
+
+
+def test_lazy_attributes():
+    import gyazo
+    from gyazo.api import Api
+
+    assert gyazo.Api is Api
+    assert 'AsyncApi' in dir(gyazo)
+    for name in gyazo.__all__:
+        assert getattr(gyazo, name) is not None
+
+
+def test_submodules_as_attributes():
+    code = ('import gyazo\n'
+            'print(gyazo.api.Api.__name__, gyazo.image.Image.__name__,'
+            ' gyazo.error.GyazoError.__name__)')
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     universal_newlines=True)
+    assert output.split() == ['Api', 'Image', 'GyazoError']
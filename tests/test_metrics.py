@@ -0,0 +1,85 @@
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from gyazo.api import Api
+from gyazo.metrics import Hook, Metrics, RequestInfo, endpoint_name
+from gyazo.ratelimit import RetryPolicy
+
+
+def test_endpoint_name():
+    assert endpoint_name('https://api.gyazo.com/api/images') == '/api/images'
+    assert endpoint_name('https://api.gyazo.com/api/images/abc') == \
+        '/api/images/:image_id'
+    assert endpoint_name('https://i.gyazo.com/abc.png') == '/:file'
+
+
+def _response(mocker, status_code, length=None):
+    response = mocker.MagicMock()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict()
+    if length is not None:
+        response.headers['Content-Length'] = str(length)
+    return response
+
+
+def test_metrics_records_requests(mocker):
+    metrics = Metrics(buckets=(0.1, 1.0))
+    info = RequestInfo('get', 'https://api.gyazo.com/api/images/abc')
+    metrics.after_response(info, _response(mocker, 200, 10), 0.05)
+    metrics.after_response(info, _response(mocker, 404), 0.5)
+    retry = RequestInfo('get', 'https://api.gyazo.com/api/images/def', 1)
+    metrics.on_error(retry, requests.ConnectionError(), 2.0)
+
+    stats = metrics.get('GET', '/api/images/:image_id')
+    assert stats.requests == 3
+    assert stats.errors == 2
+    assert stats.retries == 1
+    assert stats.statuses == {200: 1, 404: 1}
+    assert stats.buckets == [1, 1, 1]
+    assert stats.response_bytes == 10
+    assert stats.error_rate == 2 / 3
+
+    [item] = metrics.snapshot()
+    assert item['buckets'] == {'0.1': 1, '1.0': 2, '+Inf': 3}
+
+    text = metrics.to_prometheus()
+    assert ('gyazo_requests_total{method="GET",'
+            'endpoint="/api/images/:image_id"} 3') in text
+    assert ('gyazo_request_duration_seconds_bucket{method="GET",'
+            'endpoint="/api/images/:image_id",le="1.0"} 2') in text
+    assert ('gyazo_responses_total{method="GET",'
+            'endpoint="/api/images/:image_id",status="404"} 1') in text
+
+    metrics.reset()
+    assert metrics.snapshot() == []
+
+
+def test_api_calls_hooks(mocker):
+    events = []
+
+    class Recorder(Hook):
+        def before_request(self, info):
+            events.append(('before', info.method, info.attempt))
+
+        def after_response(self, info, response, elapsed):
+            events.append(('after', response.status_code))
+
+        def on_error(self, info, error, elapsed):
+            events.append(('error', type(error)))
+
+    api = Api(hooks=[Recorder()],
+              retry=RetryPolicy(max_retries=2, backoff_factor=0))
+    session = api.get_session(api.api_url)
+    mocker.patch.object(session, 'request', side_effect=[
+        requests.ConnectionError(),
+        _response(mocker, 200),
+    ])
+
+    api._request_url(api.api_url + '/api/images', 'get')
+
+    assert events == [
+        ('before', 'GET', 0),
+        ('error', requests.ConnectionError),
+        ('before', 'GET', 1),
+        ('after', 200),
+    ]
@@ -0,0 +1,55 @@
+import io
+
+from gyazo.multipart import MultipartEncoder
+
+
+def _expected_body(boundary, filename, content):
+    return (
+        '--{b}\r\n'
+        'Content-Disposition: form-data; name="title"\r\n\r\n'
+        'Title\r\n'
+        '--{b}\r\n'
+        'Content-Disposition: form-data; name="imagedata"; '
+        'filename="{f}"\r\n\r\n'
+    ).format(b=boundary, f=filename).encode() + content + (
+        '\r\n--{b}--\r\n'.format(b=boundary).encode())
+
+
+def test_encode_path(tmp_path):
+    path = tmp_path / 'a.png'
+    path.write_bytes(b'0123456789')
+    progress = []
+    encoder = MultipartEncoder({'title': 'Title'}, 'imagedata', str(path),
+                               chunk_size=4,
+                               progress=lambda sent, total: progress.append(
+                                   (sent, total)))
+
+    body = b''.join(encoder)
+
+    assert body == _expected_body(encoder.boundary, 'a.png', b'0123456789')
+    assert len(encoder) == len(body)
+    assert encoder.content_type == (
+        'multipart/form-data; boundary=' + encoder.boundary)
+    assert progress[-1] == (len(body), len(body))
+
+
+def test_encode_file_object():
+    f = io.BytesIO(b'xx0123')
+    f.seek(2)
+    encoder = MultipartEncoder({'title': 'Title'}, 'imagedata', f)
+
+    body = b''.join(encoder)
+
+    assert body == _expected_body(encoder.boundary, 'imagedata', b'0123')
+    assert len(encoder) == len(body)
+
+
+def test_encode_iterable_has_unknown_length():
+    encoder = MultipartEncoder({'title': 'Title'}, 'imagedata',
+                               iter([b'01', b'23']), filename='a.gif')
+
+    body = b''.join(encoder)
+
+    assert body == _expected_body(encoder.boundary, 'a.gif', b'0123')
+    assert encoder.length is None
+    assert len(encoder) == 0
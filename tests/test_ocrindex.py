@@ -0,0 +1,108 @@
+import sqlite3
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from gyazo import ocrindex
+from gyazo.api import Api
+from gyazo.image import Image, ImageList
+from gyazo.ocrindex import OcrIndex
+
+
+def _record(image_id, description, locale='en'):
+    return {'image_id': image_id, 'type': 'png',
+            'created_at': '2020-02-01T13:31:37+0000',
+            'ocr': {'locale': locale, 'description': description}}
+
+
+@pytest.fixture(params=[True, False], ids=['fts5', 'scan'])
+def index(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(ocrindex, '_fts5_available', lambda c: False)
+    return OcrIndex()
+
+
+def test_search(index):
+    images = ImageList.from_list([
+        _record('a', 'Connection refused\nretrying'),
+        _record('b', 'Build succeeded'),
+        _record('c', 'Fehler: connection lost', locale='de'),
+        {'image_id': 'd', 'type': 'png',
+         'created_at': '2020-02-01T13:31:37+0000'},
+    ], lazy=True)
+
+    assert index.add(images) == 3
+    assert images.is_lazy
+    assert len(index) == 3
+    assert 'd' not in index
+    assert sorted(index.search_ids('connection')) == ['a', 'c']
+    assert index.search_ids('connection refused') == ['a']
+    assert index.search_ids('connection', locale='de') == ['c']
+    assert index.search_ids('') == []
+    [image] = index.search('succeeded')
+    assert image == Image.from_dict(_record('b', 'Build succeeded'))
+
+
+def test_add_updates_and_remove(index):
+    index.add([Image.from_dict(_record('a', 'old text'))])
+    assert index.add([Image.from_dict(_record('a', 'old text'))]) == 0
+    assert index.add([Image.from_dict(_record('a', 'new text'))]) == 1
+
+    assert index.search_ids('old') == []
+    assert index.search_ids('new') == ['a']
+    index.remove(['a', 'unknown'])
+    assert index.search_ids('new') == []
+    assert len(index) == 0
+
+
+def test_quotes_special_characters(index):
+    index.add([Image.from_dict(_record('a', 'say "hello" 100%'))])
+    assert index.search_ids('"hello"') == ['a']
+    assert index.search_ids('100%') == ['a']
+
+
+def test_syntax_query():
+    index = OcrIndex()
+    index.add([Image.from_dict(_record('a', 'error')),
+               Image.from_dict(_record('b', 'warning'))])
+    assert sorted(index.search_ids('error OR warning', syntax=True)) == \
+        ['a', 'b']
+
+
+def test_persistent(tmp_path):
+    path = str(tmp_path / 'ocr.db')
+    with OcrIndex(path) as index:
+        index.add([Image.from_dict(_record('a', 'persisted'))])
+    with OcrIndex(path) as index:
+        assert index.search_ids('persisted') == ['a']
+
+
+def test_api_updates_index(mocker):
+    index = OcrIndex()
+    api = Api(ocr_index=index)
+
+    def response(status_code, json_data):
+        r = mocker.MagicMock()
+        r.status_code = status_code
+        r.headers = CaseInsensitiveDict()
+        r.json.return_value = json_data
+        return r
+
+    mocker.patch.object(api, '_request_url', side_effect=[
+        response(200, [_record('a', 'hello world')]),
+        response(200, _record('a', 'hello world')),
+    ])
+    api.get_image_list(lazy=True)
+    assert index.search_ids('hello') == ['a']
+
+    api.delete_image('a')
+    assert index.search_ids('hello') == []
+
+
+def test_trigram_tokenizer():
+    try:
+        index = OcrIndex(tokenizer='trigram')
+    except sqlite3.OperationalError:
+        pytest.skip('trigram tokenizer requires SQLite 3.34+')
+    index.add([Image.from_dict(_record('a', 'スクリーンショットを保存', 'ja'))])
+    assert index.search_ids('ショット') == ['a']
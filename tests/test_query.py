@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+
+from gyazo.api import Api
+from gyazo.image import ImageList
+from gyazo.query import ImageQuery
+
+
+def _record(image_id, created_at, type_='png'):
+    return {'image_id': image_id, 'type': type_, 'created_at': created_at}
+
+
+def _pages(lazy=True):
+    return [
+        ImageList.from_list([
+            _record('e', '2020-05-01T00:00:00+0000', 'gif'),
+            _record('d', '2020-04-01T00:00:00+0000'),
+        ], lazy=lazy),
+        ImageList.from_list([
+            _record('c', '2020-03-01T00:00:00+0000', 'gif'),
+            _record('b', '2020-02-01T00:00:00+0000'),
+        ], lazy=lazy),
+        ImageList.from_list([
+            _record('a', '2020-01-01T00:00:00+0000', 'gif'),
+        ], lazy=lazy),
+    ]
+
+
+def test_filter_pages_stops_at_lower_bound():
+    pages = _pages()
+    consumed = []
+
+    def iterate():
+        for page in pages:
+            consumed.append(page)
+            yield page
+
+    query = ImageQuery(created_after=datetime(2020, 2, 15),
+                       created_before=datetime(2020, 4, 15))
+    assert [i.image_id for i in query.filter_pages(iterate())] == ['d', 'c']
+    assert len(consumed) == 2
+
+
+def test_filter_pages_on_records_only_builds_matches():
+    pages = _pages()
+    seen = []
+
+    def record_where(record):
+        seen.append(record['image_id'])
+        return record['image_id'] != 'c'
+
+    query = ImageQuery(types=['gif'], record_where=record_where,
+                       where=lambda image: image.image_id != 'a')
+    assert [i.image_id for i in query.filter_pages(pages)] == ['e']
+    assert seen == ['e', 'c', 'a']
+    # Records stay raw; matching images are built outside the pages
+    assert all(page.is_lazy for page in pages)
+
+
+def test_filter_pages_materialized():
+    query = ImageQuery(types=['gif'],
+                       created_after=datetime(2020, 1, 15,
+                                              tzinfo=timezone.utc))
+    assert [i.image_id for i in query.filter_pages(_pages(lazy=False))] == \
+        ['e', 'c']
+
+
+def test_filter_pages_without_offset():
+    pages = [ImageList.from_list([
+        _record('b', '2020-04-01T00:00:00'),
+        _record('a', '2020-01-01 00:00:00'),
+    ], lazy=True)]
+
+    query = ImageQuery(created_after=datetime(2020, 2, 1, tzinfo=timezone.utc))
+    assert query.match_record(_record('b', '2020-04-01T00:00:00'))
+    assert [i.image_id for i in query.filter_pages(pages)] == ['b']
+
+
+def test_match_record():
+    query = ImageQuery(created_before=datetime(2020, 1, 2))
+    assert query.match_record(_record('a', '2020-01-01T00:00:00+0000'))
+    assert not query.match_record(_record('a', '2020-01-03T00:00:00+0000'))
+
+
+def test_find_images(mocker):
+    api = Api()
+    pages = iter(_pages())
+    closed = []
+
+    def iter_image_lists(**kwargs):
+        assert kwargs['lazy'] is True
+        try:
+            for page in pages:
+                yield page
+        finally:
+            closed.append(True)
+
+    mocker.patch.object(api, 'iter_image_lists', side_effect=iter_image_lists)
+
+    found = api.find_images(types=['png'],
+                            created_after=datetime(2020, 3, 15))
+    assert [i.image_id for i in found] == ['d']
+    assert closed == [True]
@@ -0,0 +1,81 @@
+import pytest
+
+from gyazo.ratelimit import RateLimiter, RetryPolicy, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self, mocker):
+        self.now = 1000.0
+        mocker.patch('time.monotonic', side_effect=lambda: self.now)
+        mocker.patch('time.sleep', side_effect=self.sleep)
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.mark.parametrize('value,expected', [
+    (None, None),
+    ('', None),
+    ('3', 3.0),
+    ('-1', 0.0),
+    ('Thu, 01 Jan 1970 00:00:00 GMT', 0.0),
+    ('not a date', None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.delay(n) for n in range(1, 5)] == [1, 2, 4, 5]
+
+
+def test_retry_policy_jitter():
+    policy = RetryPolicy(backoff_factor=1)
+    assert all(0 <= policy.delay(3) <= 4 for _ in range(20))
+
+
+def test_rate_limiter_token_bucket(mocker):
+    clock = FakeClock(mocker)
+    limiter = RateLimiter(rate=2, burst=2)
+
+    for _ in range(4):
+        limiter.acquire()
+
+    assert sum(clock.sleeps) == pytest.approx(1.0)
+    assert limiter.throttled == 2
+
+
+def test_rate_limiter_try_acquire(mocker):
+    FakeClock(mocker)
+    limiter = RateLimiter(rate=2, burst=1)
+
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+    assert limiter.throttled == 0
+
+
+def test_rate_limiter_retry_after(mocker):
+    clock = FakeClock(mocker)
+    limiter = RateLimiter()
+
+    limiter.update(429, {'Retry-After': '7'})
+    limiter.acquire()
+
+    assert clock.sleeps == [7]
+
+
+def test_rate_limiter_remaining(mocker):
+    clock = FakeClock(mocker)
+    limiter = RateLimiter()
+
+    limiter.update(200, {'X-RateLimit-Remaining': '5',
+                         'X-RateLimit-Reset': '10'})
+    limiter.acquire()
+    limiter.update(200, {'X-RateLimit-Remaining': '0',
+                         'X-RateLimit-Reset': '10'})
+    limiter.acquire()
+
+    assert clock.sleeps == [10]
@@ -0,0 +1,55 @@
+import io
+import json
+
+import pytest
+
+from gyazo.image import Image, ImageList
+from gyazo.serializer import Serializer, get_serializer, write_ndjson
+
+
+records = [
+    {'image_id': 'abc', 'type': 'png',
+     'created_at': '2020-02-01T13:31:37+0000',
+     'ocr': {'locale': 'ja', 'description': 'OCRの結果'}},
+    {'image_id': 'def', 'type': 'gif',
+     'created_at': '2014-06-21T13:45:46+0900', 'comments': []},
+]
+
+
+@pytest.mark.parametrize('name', ['json', 'orjson', 'ujson'])
+def test_backends_agree(name):
+    try:
+        serializer = get_serializer(name)
+    except ImportError:
+        pytest.skip(name + ' is not installed')
+    data = {'b': [1, 2], 'a': 'テキスト'}
+    assert json.loads(serializer.dumps(data)) == data
+    assert serializer.dumps(data) == Serializer().dumps(data)
+
+
+def test_get_serializer_unknown():
+    with pytest.raises(ValueError):
+        get_serializer('yaml')
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_write_ndjson_pages(lazy):
+    f = io.BytesIO()
+    pages = [ImageList.from_list(records, lazy=lazy)] * 2
+
+    assert write_ndjson(pages, f) == 4
+
+    lines = f.getvalue().decode('utf-8').splitlines()
+    expected = records if lazy else [
+        Image.from_dict(r).to_dict() for r in records]
+    assert [json.loads(l) for l in lines] == expected * 2
+
+
+def test_write_ndjson_images_to_text_file():
+    f = io.StringIO()
+    images = ImageList.from_list(records)
+
+    assert write_ndjson(iter(images), f, serializer=Serializer()) == 2
+    assert f.getvalue().splitlines()[0] == (
+        '{"created_at":"2020-02-01T13:31:37+0000","image_id":"abc",'
+        '"ocr":{"description":"OCRの結果","locale":"ja"},"type":"png"}')
@@ -0,0 +1,118 @@
+import pytest
+
+from gyazo.api import Api
+from gyazo.image import ImageList
+from gyazo.sync import SyncIndex
+
+
+def make_library(ids):
+    return [
+        {'image_id': image_id, 'type': 'png',
+         'url': 'https://i.gyazo.com/{}.png'.format(image_id),
+         'created_at': '2020-02-01T13:31:{:02d}+0000'.format(len(ids) - n)}
+        for n, image_id in enumerate(ids)
+    ]
+
+
+@pytest.fixture
+def library():
+    # Newest first, like the API
+    return make_library(['e', 'd', 'c', 'b', 'a'])
+
+
+@pytest.fixture
+def api(mocker, library):
+    api = Api()
+
+    def get_image_list(page, per_page, **kwargs):
+        start = (page - 1) * per_page
+        images = ImageList.from_list(library[start:start + per_page])
+        images.set_attributes_from_headers({
+            'x-total-count': str(len(library)),
+            'x-current-page': str(page),
+            'x-per-page': str(per_page),
+        })
+        return images
+
+    mocker.patch.object(api, 'get_image_list', side_effect=get_image_list)
+    return api
+
+
+def test_sync_stops_at_known_image(api, library):
+    index = SyncIndex()
+    index.add(ImageList.from_list(make_library(['b', 'a'])))
+
+    result = index.sync(api, per_page=2)
+
+    assert [i.image_id for i in result.added] == ['e', 'd', 'c']
+    assert result.pages == 2
+    assert index.image_ids() == {'a', 'b', 'c', 'd', 'e'}
+
+    result = index.sync(api, per_page=2)
+
+    assert result.added == []
+    assert result.pages == 1
+
+
+def test_sync_detect_deletions(api, library):
+    index = SyncIndex()
+    index.add(ImageList.from_list(make_library(['x', 'b', 'a'])))
+
+    result = index.sync(api, per_page=2, detect_deletions=True)
+
+    assert [i.image_id for i in result.added] == ['e', 'd', 'c']
+    assert result.deleted == ['x']
+    assert result.pages == 3
+    assert 'x' not in index
+    assert len(index) == 5
+
+
+def test_index_is_persistent(tmp_path, library):
+    path = str(tmp_path / 'index.sqlite3')
+    with SyncIndex(path) as index:
+        index.add(ImageList.from_list(library))
+
+    with SyncIndex(path) as index:
+        assert [i.image_id for i in index.images()] == [
+            'e', 'd', 'c', 'b', 'a']
+
+
+def _fail_downloads(mocker, api, failed_ids):
+    def download(url, sink, chunk_size, session):
+        if any(url.endswith('/{}.png'.format(i)) for i in failed_ids):
+            raise IOError('connection reset')
+        sink.write(b'data')
+        return 4
+
+    mocker.patch('gyazo.image._download_stream', side_effect=download)
+
+
+def test_sync_retries_failed_downloads(api, library, mocker, tmp_path):
+    index = SyncIndex()
+    index.add(ImageList.from_list(make_library(['a'])))
+    _fail_downloads(mocker, api, ['c'])
+
+    result = index.sync(api, per_page=2, download_dir=str(tmp_path))
+
+    assert result.failed == ['c']
+    assert index.image_ids() == {'a', 'b'}
+
+    _fail_downloads(mocker, api, [])
+    result = index.sync(api, per_page=2, download_dir=str(tmp_path))
+
+    assert [i.image_id for i in result.added] == ['e', 'd', 'c']
+    assert result.download_report.skipped == 2
+    assert result.failed == []
+    assert index.image_ids() == {'a', 'b', 'c', 'd', 'e'}
+
+
+def test_sync_detect_deletions_skips_failed_downloads(api, library, mocker,
+                                                      tmp_path):
+    index = SyncIndex()
+    _fail_downloads(mocker, api, ['c'])
+
+    result = index.sync(api, per_page=2, detect_deletions=True,
+                        download_dir=str(tmp_path))
+
+    assert result.failed == ['c']
+    assert index.image_ids() == {'a', 'b', 'd', 'e'}